@@ -3,19 +3,141 @@ from pathlib import Path
 from typing import Optional
 import cv2
 import numpy as np
-from PIL import Image, ImageOps, ImageDraw, ImageFont, UnidentifiedImageError
+from PIL import Image, ImageColor
 import io
-import toml
+import threading
+import tomllib
+
+# Optional libjpeg-turbo encoder for faster JPEG downloads
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, RuntimeError, OSError):
+    _turbo_jpeg = None
+
+@st.cache_resource
+def load_config(path: str = "config.toml") -> dict:
+    """Parse the TOML config once per process rather than on every rerun."""
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+CONFIG = load_config()
+
+# Long edge (px) the image is shrunk to before running face detection
+DETECTION_MAX_SIDE = 640
+
+# Optional YuNet CNN detector (OpenCV Zoo), selected with detector = "yunet" in
+# config.toml's [detection] section. Falls back to the Haar cascade when the
+# ONNX model has not been downloaded to yunet_model.
+DETECTOR = CONFIG.get("detection", {}).get("detector", "haar")
+YUNET_MODEL_PATH = CONFIG.get("detection", {}).get("yunet_model", "models/face_detection_yunet_2023mar.onnx")
+_yunet_lock = threading.Lock()
+
+
+# The cascade is shared between sessions and detectMultiScale keeps working
+# buffers on the instance, so concurrent detections are serialized
+_cascade_lock = threading.Lock()
+
+
+@st.cache_resource
+def _get_cascade(path: str) -> cv2.CascadeClassifier:
+    """Load a Haar cascade once per process and share it across reruns."""
+    if not Path(path).exists():
+        raise FileNotFoundError(f"Haar Cascade file not found: {path}")
+    return cv2.CascadeClassifier(path)
+
+
+@st.cache_resource
+def _get_yunet(model_path: str) -> cv2.FaceDetectorYN:
+    """Load the YuNet face detector once per process."""
+    return cv2.FaceDetectorYN.create(model_path, "", (320, 320), score_threshold=0.6)
+
+
+def _use_yunet() -> bool:
+    return DETECTOR == "yunet" and Path(YUNET_MODEL_PATH).exists()
+
+
+# Smallest long edge kept in the detection pyramid
+PYRAMID_MIN_SIDE = 160
+
+
+def build_detection_pyramid(image: np.ndarray) -> list:
+    """Halve image with cv2.pyrDown down to PYRAMID_MIN_SIDE; returns [(level, scale), ...].
+
+    image is grayscale for the Haar cascade or BGR for YuNet (see detection_input).
+    Levels longer than 2 * DETECTION_MAX_SIDE are dropped, since the next level
+    down is always closer to the detection size.
+    """
+    full_width = image.shape[1]
+    levels = []
+    while True:
+        if max(image.shape[:2]) <= 2 * DETECTION_MAX_SIDE:
+            levels.append((image, image.shape[1] / full_width))
+        if max(image.shape[:2]) // 2 < PYRAMID_MIN_SIDE:
+            return levels
+        image = cv2.pyrDown(image)
+
+
+def detection_input(rgb: np.ndarray) -> np.ndarray:
+    """Convert an RGB photo for the active detector: BGR for the YuNet CNN, grayscale for Haar."""
+    return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR if _use_yunet() else cv2.COLOR_RGB2GRAY)
+
+
+@st.cache_data(show_spinner=False)
+def detect_faces(image_key: str, _pyramid: list, cascade_path: str) -> tuple:
+    """Detect faces in the upload's pyramid; cached so slider changes skip detection."""
+    return _detect_in_pyramid(_pyramid, cascade_path)
+
+
+def _detect_in_pyramid(pyramid: list, cascade_path: str) -> tuple:
+    """Run the detector on the level nearest DETECTION_MAX_SIDE and map boxes back to full resolution."""
+    level, scale = min(pyramid, key=lambda level: abs(max(level[0].shape[:2]) - DETECTION_MAX_SIDE))
+    if level.ndim == 3:
+        # Colour pyramid: YuNet is a colour CNN and gets the BGR pixels directly
+        faces = _detect_yunet(level)
+    else:
+        # Headshot faces are large, so skip windows far smaller than the photo
+        detection = CONFIG.get("detection", {})
+        short_edge = min(level.shape)
+        min_side = max(40, short_edge // 8)
+        cascade = _get_cascade(cascade_path)
+        with _cascade_lock:
+            faces = cascade.detectMultiScale(
+                level,
+                scaleFactor=detection.get("scale_factor", 1.2),
+                minNeighbors=detection.get("min_neighbors", 4),
+                minSize=(min_side, min_side),
+                maxSize=(short_edge, short_edge),
+                flags=cv2.CASCADE_SCALE_IMAGE
+            )
+    return tuple(tuple(int(v / scale) for v in face[:4]) for face in faces)
+
+
+def _detect_yunet(bgr: np.ndarray) -> tuple:
+    detector = _get_yunet(YUNET_MODEL_PATH)
+    # The detector is shared between sessions and setInputSize mutates it
+    with _yunet_lock:
+        detector.setInputSize((bgr.shape[1], bgr.shape[0]))
+        _, faces = detector.detect(bgr)
+    return () if faces is None else faces
+
+
+def _clamp_crop_box(box: tuple, width: int, height: int) -> tuple:
+    """Shift a (left, top, right, bottom) box back inside the image, then clip any remaining overflow."""
+    box = np.array(box, dtype=np.int64)
+    limits = np.array([width, height])
+    box += np.tile(-np.minimum(box[:2], 0), 2)
+    box -= np.tile(np.maximum(box[2:] - limits, 0), 2)
+    return tuple(int(v) for v in np.clip(box, 0, np.tile(limits, 2)))
 
-# Load config from TOML file
-CONFIG = toml.load("config.toml")
 
 class HeadshotProcessor:
     """Process images into headshots using OpenCV for face detection."""
     
     def __init__(
         self,
-        input_image: Image.Image,
+        input_array: np.ndarray,
         target_width: int,
         target_height: int,
         padding_top_ratio: float,
@@ -26,8 +148,12 @@ class HeadshotProcessor:
         shift_x: int = 0,
         shift_y: int = 0,
         cascade_path: Optional[str] = None,
+        image_key: Optional[str] = None,
+        detection_pyramid: Optional[list] = None,
     ):
-        self.input_image = input_image
+        self.input_array = input_array
+        self.image_key = image_key
+        self.detection_pyramid = detection_pyramid
         self.target_size = (target_width, target_height)
         self.padding_ratios = {
             "top": padding_top_ratio,
@@ -36,60 +162,41 @@ class HeadshotProcessor:
         }
         self.cascade_path = cascade_path or cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
         self.border_color = border_color
+        # Parse the colour once; the canvas fill needs an (r, g, b) tuple
+        self.border_rgb = ImageColor.getrgb(border_color)[:3]
         self.zoom_out_factor = zoom_out_factor
         self.shift_x = shift_x
         self.shift_y = shift_y
         self._validate_inputs()
     
     def _validate_inputs(self) -> None:
-        if not Path(self.cascade_path).exists():
-            raise FileNotFoundError(f"Haar Cascade file not found: {self.cascade_path}")
-        if not isinstance(self.input_image, Image.Image):
-            raise ValueError("Input must be a PIL Image object")
+        if not isinstance(self.input_array, np.ndarray) or self.input_array.ndim != 3:
+            raise ValueError("Input must be an RGB numpy array")
     
     def process_image(self) -> Image.Image:
         """Process image: detect face, crop with zoom-out and shift, resize with aspect ratio preservation."""
         try:
-            img_array = np.array(self.input_image)
-            img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-            face_cascade = cv2.CascadeClassifier(self.cascade_path)
-            faces = face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(30, 30)
-            )
+            img_height, img_width = self.input_array.shape[:2]
+            if self.detection_pyramid is not None:
+                # Face box only depends on the upload, so reuse the cached detection
+                faces = detect_faces(self.image_key, self.detection_pyramid, self.cascade_path)
+            else:
+                faces = _detect_in_pyramid(build_detection_pyramid(detection_input(self.input_array)), self.cascade_path)
             
             if len(faces) == 0:
                 st.warning("No face detected. Using center crop.")
-                width, height = self.input_image.size
                 target_ratio = self.target_size[0] / self.target_size[1]
                 # Apply zoom_out_factor to center crop as well
-                base_crop_width = min(width, int(height * target_ratio))
-                base_crop_height = min(height, int(width / target_ratio))
+                base_crop_width = min(img_width, int(img_height * target_ratio))
+                base_crop_height = min(img_height, int(img_width / target_ratio))
                 crop_width = int(base_crop_width * self.zoom_out_factor)
                 crop_height = int(base_crop_height * self.zoom_out_factor)
-                crop_left = (width - crop_width) // 2 + self.shift_x
-                crop_top = (height - crop_height) // 2 + self.shift_y
-                crop_right = crop_left + crop_width
-                crop_bottom = crop_top + crop_height
-                
-                if crop_left < 0:
-                    crop_right -= crop_left
-                    crop_left = 0
-                if crop_top < 0:
-                    crop_bottom -= crop_top
-                    crop_top = 0
-                if crop_right > width:
-                    crop_left -= (crop_right - width)
-                    crop_right = width
-                if crop_bottom > height:
-                    crop_top -= (crop_bottom - height)
-                    crop_bottom = height
-                
-                cropped = self.input_image.crop((crop_left, crop_top, crop_right, crop_bottom))
-                face_box = None
+                crop_left = (img_width - crop_width) // 2 + self.shift_x
+                crop_top = (img_height - crop_height) // 2 + self.shift_y
+                crop_left, crop_top, crop_right, crop_bottom = _clamp_crop_box(
+                    (crop_left, crop_top, crop_left + crop_width, crop_top + crop_height),
+                    img_width, img_height
+                )
             else:
                 x, y, w, h = faces[0]
                 padding_top = int(h * self.padding_ratios["top"])
@@ -99,23 +206,12 @@ class HeadshotProcessor:
                 crop_width = int((w + 2 * padding_side) * self.zoom_out_factor)
                 crop_height = int((h + padding_top + padding_bottom) * self.zoom_out_factor)
                 
-                crop_left = max(0, x + w//2 - crop_width//2 + self.shift_x)
-                crop_right = min(img_cv.shape[1], crop_left + crop_width)
-                crop_top = max(0, y + h//2 - crop_height//2 + self.shift_y)
-                crop_bottom = min(img_cv.shape[0], crop_top + crop_height)
-                
-                if crop_right > img_cv.shape[1]:
-                    crop_left -= (crop_right - img_cv.shape[1])
-                    crop_right = img_cv.shape[1]
-                if crop_bottom > img_cv.shape[0]:
-                    crop_top -= (crop_bottom - img_cv.shape[0])
-                    crop_bottom = img_cv.shape[0]
-                if crop_left < 0:
-                    crop_right -= crop_left
-                    crop_left = 0
-                if crop_top < 0:
-                    crop_bottom -= crop_top
-                    crop_top = 0
+                crop_left = x + w//2 - crop_width//2 + self.shift_x
+                crop_top = y + h//2 - crop_height//2 + self.shift_y
+                crop_left, crop_top, crop_right, crop_bottom = _clamp_crop_box(
+                    (crop_left, crop_top, crop_left + crop_width, crop_top + crop_height),
+                    img_width, img_height
+                )
                 
                 crop_width = crop_right - crop_left
                 crop_height = crop_bottom - crop_top
@@ -123,25 +219,31 @@ class HeadshotProcessor:
                 if crop_width / crop_height > target_ratio:
                     new_height = int(crop_width / target_ratio)
                     crop_top = max(0, crop_top - (new_height - crop_height) // 2)
-                    crop_bottom = min(img_cv.shape[0], crop_top + new_height)
+                    crop_bottom = min(img_height, crop_top + new_height)
                 else:
                     new_width = int(crop_height * target_ratio)
                     crop_left = max(0, crop_left - (new_width - crop_width) // 2)
-                    crop_right = min(img_cv.shape[1], crop_left + new_width)
+                    crop_right = min(img_width, crop_left + new_width)
                 
-                cropped = self.input_image.crop((crop_left, crop_top, crop_right, crop_bottom))
-                face_box = (x, y, w, h)
-            
-            cropped.thumbnail(self.target_size, Image.LANCZOS)
-            final_img = ImageOps.expand(
-                cropped,
-                border=(
-                    (self.target_size[0] - cropped.width) // 2,
-                    (self.target_size[1] - cropped.height) // 2
-                ),
-                fill=self.border_color
+            # Resize a zero-copy view of the crop straight into a border-filled canvas:
+            # one pass over the output, no intermediate crop or resized image
+            target_width, target_height = self.target_size
+            crop_width = crop_right - crop_left
+            crop_height = crop_bottom - crop_top
+            scale = min(target_width / crop_width, target_height / crop_height)
+            out_width, out_height = int(crop_width * scale), int(crop_height * scale)
+            offset_x = (target_width - out_width) // 2
+            offset_y = (target_height - out_height) // 2
+            canvas = np.full(
+                (target_height, target_width, 3), self.border_rgb, np.uint8
+            )
+            cv2.resize(
+                self.input_array[crop_top:crop_bottom, crop_left:crop_right],
+                (out_width, out_height),
+                dst=canvas[offset_y:offset_y + out_height, offset_x:offset_x + out_width],
+                interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LANCZOS4
             )
-            final_img = final_img.resize(self.target_size, Image.LANCZOS)
+            final_img = Image.fromarray(canvas)
             
             # Annotations removed for cleaner UI
             
@@ -149,7 +251,67 @@ class HeadshotProcessor:
         
         except Exception as e:
             st.error(f"Error processing image: {str(e)}")
-            return self.input_image
+            return Image.fromarray(self.input_array)
+
+def release_session_image():
+    """Release the decoded upload, its detection pyramid and the rendered preview."""
+    st.session_state.current_image = None
+    st.session_state.original_array = None
+    st.session_state.detection_pyramid = None
+    st.session_state.image_key = None
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def render_headshot(
+    image_key: str,
+    _input_array: np.ndarray,
+    _detection_pyramid: Optional[list],
+    target_width: int,
+    target_height: int,
+    padding_top: float,
+    padding_bottom: float,
+    padding_side: float,
+    shift_x: int,
+    shift_y: int,
+    zoom_out_factor: float,
+    border_color: str,
+) -> Image.Image:
+    """Render the headshot, memoized on (image_key, controls) so revisited settings are instant.
+
+    The array and its pyramid are excluded from hashing; image_key identifies them.
+    """
+    processor = HeadshotProcessor(
+        input_array=_input_array,
+        target_width=target_width,
+        target_height=target_height,
+        padding_top_ratio=padding_top,
+        padding_bottom_ratio=padding_bottom,
+        padding_side_ratio=padding_side,
+        border_color=border_color,
+        zoom_out_factor=zoom_out_factor,
+        shift_x=shift_x,
+        shift_y=shift_y,
+        image_key=image_key,
+        detection_pyramid=_detection_pyramid,
+    )
+    return processor.process_image()
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def encode_headshot(render_key: tuple, save_kwargs: tuple, _image: Image.Image) -> bytes:
+    """Encode the headshot for download, memoized on the render key and save options.
+
+    JPEG goes through libjpeg-turbo when PyTurboJPEG is installed; anything else
+    (or a missing turbojpeg) falls back to Pillow.
+    """
+    options = dict(save_kwargs)
+    if options["format"] == "JPEG" and _turbo_jpeg is not None:
+        return _turbo_jpeg.encode(
+            np.asarray(_image.convert("RGB")),
+            quality=options.get("quality", 90),
+            pixel_format=TJPF_RGB
+        )
+    buffer = io.BytesIO()
+    _image.save(buffer, **options)
+    return buffer.getvalue()
 
 def main():
     # Set sidebar to be expanded by default
@@ -166,8 +328,12 @@ def main():
     # Initialize session state
     if "current_image" not in st.session_state:
         st.session_state.current_image = None
-    if "original_image" not in st.session_state:
-        st.session_state.original_image = None
+    if "original_array" not in st.session_state:
+        st.session_state.original_array = None
+    if "image_key" not in st.session_state:
+        st.session_state.image_key = None
+    if "detection_pyramid" not in st.session_state:
+        st.session_state.detection_pyramid = None
     if "control_state" not in st.session_state:
         st.session_state.control_state = {
             "target_width": CONFIG["default"]["target_width"],
@@ -196,8 +362,8 @@ def main():
     with col2:
         st.markdown("**Profile:**")
         
-        # Get preset options from config (exclude 'slider' and 'download_formats' sections)
-        available_presets = [key.title() for key in CONFIG.keys() if key != 'slider' and key != 'download_formats']
+        # Get preset options from config (exclude the non-preset sections)
+        available_presets = [key.title() for key in CONFIG.keys() if key not in ('slider', 'download_formats', 'ui', 'detection')]
         preset_options = available_presets + ["Custom"]
         
         # Initialize last_preset if not exists
@@ -216,30 +382,36 @@ def main():
     st.sidebar.title("Manual Adjustments")
     
     if uploaded_file is not None:
-        try:
-            input_image = Image.open(uploaded_file).convert("RGB")
-            st.session_state.original_image = input_image
-            st.session_state.current_image = input_image
-            
-            # Apply current settings on upload (preserve selected preset)
-            processor = HeadshotProcessor(
-                input_image=st.session_state.current_image,
-                target_width=st.session_state.control_state["target_width"],
-                target_height=st.session_state.control_state["target_height"],
-                padding_top_ratio=st.session_state.control_state["padding_top"],
-                padding_bottom_ratio=st.session_state.control_state["padding_bottom"],
-                padding_side_ratio=st.session_state.control_state["padding_side"],
-                border_color=st.session_state.control_state["border_color"],
-                zoom_out_factor=st.session_state.control_state["zoom_out_factor"],
-                shift_x=st.session_state.control_state["shift_x"],
-                shift_y=st.session_state.control_state["shift_y"],
-            )
-            st.session_state.current_image = processor.process_image()
-        except UnidentifiedImageError:
-            st.error("Cannot identify image file. Please upload a valid PNG or JPG.")
-            return
+        # Streamlit assigns each upload its own file_id, so a rerun can tell
+        # it is still the same photo without hashing the bytes again
+        image_key = uploaded_file.file_id
+        if image_key != st.session_state.image_key:
+            # Drop the previous photo before decoding the next so two full-size
+            # arrays are never held by the session at once
+            release_session_image()
+            # Decode with libjpeg-turbo via OpenCV once per upload, not on every rerun
+            bgr = cv2.imdecode(np.frombuffer(uploaded_file.getvalue(), np.uint8), cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+            if bgr is None:
+                st.error("Cannot identify image file. Please upload a valid PNG or JPG.")
+                return
+            st.session_state.original_array = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+            detection_image = bgr if _use_yunet() else cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+            st.session_state.detection_pyramid = build_detection_pyramid(detection_image)
+            st.session_state.image_key = image_key
+        
+        # Apply current settings on upload (preserve selected preset)
+        st.session_state.current_image = render_headshot(
+            st.session_state.image_key,
+            st.session_state.original_array,
+            st.session_state.detection_pyramid,
+            **st.session_state.control_state,
+        )
     
     
+    elif st.session_state.image_key is not None:
+        # The upload was removed; nothing displays the decoded photo any more
+        release_session_image()
+    
     # Function to apply preset settings
     def apply_preset(preset_name):
         preset_key = preset_name.lower()
@@ -265,25 +437,28 @@ def main():
         if selected_preset != "Custom":
             apply_preset(selected_preset)
             # Also update the original image processing if we have one
-            if st.session_state.original_image is not None:
-                processor = HeadshotProcessor(
-                    input_image=st.session_state.original_image,
-                    target_width=st.session_state.control_state["target_width"],
-                    target_height=st.session_state.control_state["target_height"],
-                    padding_top_ratio=st.session_state.control_state["padding_top"],
-                    padding_bottom_ratio=st.session_state.control_state["padding_bottom"],
-                    padding_side_ratio=st.session_state.control_state["padding_side"],
-                    border_color=st.session_state.control_state["border_color"],
-                    zoom_out_factor=st.session_state.control_state["zoom_out_factor"],
-                    shift_x=st.session_state.control_state["shift_x"],
-                    shift_y=st.session_state.control_state["shift_y"],
+            if st.session_state.original_array is not None:
+                st.session_state.current_image = render_headshot(
+                    st.session_state.image_key,
+                    st.session_state.original_array,
+                    st.session_state.detection_pyramid,
+                    **st.session_state.control_state,
                 )
-                st.session_state.current_image = processor.process_image()
             # Force rerun to update sliders with new values
             st.rerun()
+    # With live preview off the controls sit in a form, so a burst of slider
+    # changes is applied (and processed) once on submit instead of per change
+    live_preview = st.sidebar.toggle(
+        "Live preview",
+        value=True,
+        help="Turn off to adjust several settings and apply them together.",
+        key="live_preview"
+    )
+    controls = st.sidebar.container() if live_preview else st.sidebar.form("controls", border=False)
+    
     # Organize controls in sidebar with 2-column layout
-    st.sidebar.subheader("Dimensions")
-    with st.sidebar:
+    with controls:
+        st.subheader("Dimensions")
         col1, col2 = st.columns(2)
         with col1:
             target_width = st.slider(
@@ -305,9 +480,8 @@ def main():
                 help="Set the final height of the headshot in pixels.",
                 key="target_height"
             )
-    
-    st.sidebar.subheader("Padding")
-    with st.sidebar:
+        
+        st.subheader("Padding")
         col1, col2 = st.columns(2)
         with col1:
             padding_top = st.slider(
@@ -338,9 +512,8 @@ def main():
                 help="Add space on the left and right of the face (as a fraction of face width).",
                 key="padding_side"
             )
-    
-    st.sidebar.subheader("Position & Zoom")
-    with st.sidebar:
+        
+        st.subheader("Position & Zoom")
         col1, col2 = st.columns(2)
         with col1:
             shift_x = st.slider(
@@ -371,16 +544,18 @@ def main():
                 help="Scale the crop box size (1.0 = no zoom-out, 1.5 = 50% larger crop).",
                 key="zoom_out_factor"
             )
-    
-    
-    # Border color in sidebar
-    st.sidebar.subheader("Appearance")
-    border_color = st.sidebar.color_picker(
-        "Border Colour",
-        st.session_state.control_state["border_color"],
-        help="Used when image doesn't match target aspect ratio",
-        key="border_color"
-    )
+        
+        # Border color in sidebar
+        st.subheader("Appearance")
+        border_color = st.color_picker(
+            "Border Colour",
+            st.session_state.control_state["border_color"],
+            help="Used when image doesn't match target aspect ratio",
+            key="border_color"
+        )
+        
+        if not live_preview:
+            st.form_submit_button("Apply", width="stretch")
     
     # Process image in real-time
     if st.session_state.current_image is not None:
@@ -398,19 +573,6 @@ def main():
         )
         
         if controls_changed:
-            processor = HeadshotProcessor(
-                input_image=st.session_state.original_image,
-                target_width=target_width,
-                target_height=target_height,
-                padding_top_ratio=padding_top,
-                padding_bottom_ratio=padding_bottom,
-                padding_side_ratio=padding_side,
-                border_color=border_color,
-                zoom_out_factor=zoom_out_factor,
-                shift_x=shift_x,
-                shift_y=shift_y,
-            )
-            st.session_state.current_image = processor.process_image()
             st.session_state.control_state.update({
                 "target_width": target_width,
                 "target_height": target_height,
@@ -422,6 +584,12 @@ def main():
                 "zoom_out_factor": zoom_out_factor,
                 "border_color": border_color,
             })
+            st.session_state.current_image = render_headshot(
+                st.session_state.image_key,
+                st.session_state.original_array,
+                st.session_state.detection_pyramid,
+                **st.session_state.control_state,
+            )
     
     
     # Display before and after images side by side with placeholders
@@ -429,8 +597,8 @@ def main():
     
     with col1:
         st.subheader("Original Image")
-        if st.session_state.original_image is not None:
-            st.image(st.session_state.original_image, caption="Before (Original)", width="stretch")
+        if st.session_state.original_array is not None:
+            st.image(st.session_state.original_array, caption="Before (Original)", width="stretch")
         else:
             placeholder = st.empty()
             placeholder.info("📷 Upload an image using the sidebar to get started")
@@ -444,23 +612,12 @@ def main():
             placeholder.info("✨ Your processed headshot will appear here")
     
     # Only show download section if we have processed images
-    if st.session_state.current_image is not None and st.session_state.original_image is not None:
+    if st.session_state.current_image is not None and st.session_state.original_array is not None:
         st.markdown("---")
         
-        # Download section with multiple format options from config
-        processor = HeadshotProcessor(
-            input_image=st.session_state.original_image,
-            target_width=target_width,
-            target_height=target_height,
-            padding_top_ratio=padding_top,
-            padding_bottom_ratio=padding_bottom,
-            padding_side_ratio=padding_side,
-            border_color=border_color,
-            zoom_out_factor=zoom_out_factor,
-            shift_x=shift_x,
-            shift_y=shift_y,
-        )
-        clean_image = processor.process_image()
+        # The preview is already the clean render for the current controls, so reuse it
+        clean_image = st.session_state.current_image
+        render_key = (st.session_state.image_key, tuple(st.session_state.control_state.items()))
         
         st.subheader("💾 Download Headshot")
         
@@ -483,19 +640,16 @@ def main():
             with col2:
                 # Generate download button for selected format
                 format_info = formats[selected_format]
-                buffer = io.BytesIO()
                 save_kwargs = {"format": format_info["format"]}
                 
                 if format_info.get("quality"):
                     save_kwargs["quality"] = format_info["quality"]
                 if format_info.get("optimize"):
                     save_kwargs["optimize"] = format_info["optimize"]
-                    
-                clean_image.save(buffer, **save_kwargs)
                 
                 st.download_button(
                     label=f"💾 Download as {format_info['format'].upper()}",
-                    data=buffer.getvalue(),
+                    data=encode_headshot(render_key, tuple(save_kwargs.items()), clean_image),
                     file_name=f"headshot{format_info['extension']}",
                     mime=format_info["mime"],
                     help=f"Download the processed headshot as {format_info['format']} format",
@@ -503,13 +657,11 @@ def main():
                 )
         else:
             # Fallback to JPEG if no formats configured
-            buffer = io.BytesIO()
-            clean_image.save(buffer, format="JPEG")
             col1, col2, col3 = st.columns([1, 2, 1])
             with col2:
                 st.download_button(
                     label="💾 Download Headshot",
-                    data=buffer.getvalue(),
+                    data=encode_headshot(render_key, (("format", "JPEG"), ("quality", 90)), clean_image),
                     file_name="headshot.jpg",
                     mime="image/jpeg",
                     help="Download the processed headshot as a JPEG file",
@@ -2,14 +2,24 @@
 
 import streamlit as st
 import random
-from typing import Tuple
+import re
 from num2words import num2words
 from operator import add, sub, mul
 
 from .utils.logger import get_logger
+from .constants import CENTERED_COLUMN_RATIO
 
 logger = get_logger(__name__)
 
+# Optionally signed ASCII integer of at most four digits (answers never exceed
+# 100); surrounding whitespace is stripped first. The bound also keeps int() clear
+# of its 4300-digit conversion limit for pasted input.
+_ANSWER_PATTERN = re.compile(r'[+-]?[0-9]{1,4}')
+
+# Operands are drawn from 0..._MAX_OPERAND, so their spelled-out forms are fixed
+_MAX_OPERAND = 10
+_OPERAND_WORDS = tuple(num2words(n).title() for n in range(_MAX_OPERAND + 1))
+
 
 class StreamlitCaptcha:
     """A sophisticated CAPTCHA system for Streamlit apps with math problems and UI tricks."""
@@ -34,8 +44,8 @@ class StreamlitCaptcha:
 
     def _generate_captcha(self) -> None:
         """Generate a math CAPTCHA with one number as text."""
-        num1 = random.randint(0, 10)  # Smaller range for simplicity
-        num2 = random.randint(0, 10)
+        num1 = random.randint(0, _MAX_OPERAND)  # Smaller range for simplicity
+        num2 = random.randint(0, _MAX_OPERAND)
         operators = {'+': add, '-': sub, '*': mul}
         operator = random.choice(list(operators.keys()))
         
@@ -44,14 +54,16 @@ class StreamlitCaptcha:
             num1, num2 = num2, num1
         
         # Randomly convert one number to text
-        num1_str = num2words(num1).title() if random.choice([True, False]) else str(num1)
-        num2_str = str(num2) if num1_str != str(num1) else num2words(num2).title()
+        num1_str = _OPERAND_WORDS[num1] if random.choice([True, False]) else str(num1)
+        num2_str = str(num2) if num1_str != str(num1) else _OPERAND_WORDS[num2]
         
-        st.session_state.captcha_question = f"What is {num1_str} {operator} {num2_str}?"
-        st.session_state.captcha_answer = operators[operator](num1, num2)
+        question = f"What is {num1_str} {operator} {num2_str}?"
+        answer = operators[operator](num1, num2)
+        st.session_state.captcha_question = question
+        st.session_state.captcha_answer = answer
         st.session_state.button_assignment = random.choice(['submit', 'cancel'])
         
-        logger.debug(f"Generated CAPTCHA: {st.session_state.captcha_question} = {st.session_state.captcha_answer}")
+        logger.debug("Generated CAPTCHA: {} = {}", question, answer)
 
     def _is_correct_button_clicked(self, button1_clicked: bool, button2_clicked: bool) -> bool:
         """Check if the correct button (Submit) was clicked based on randomized positions."""
@@ -76,29 +88,25 @@ class StreamlitCaptcha:
             return
             
         # Validate input format - allow negative numbers
-        cleaned_input = user_answer.strip().replace('+', '')
-        if not cleaned_input:
+        answer = user_answer.strip()
+        if not answer:
             st.error("❌ **Please enter an answer before clicking Submit.**")
             self._handle_failed_attempt()
             return
-        elif not (cleaned_input.lstrip('-').isdigit()):
+        elif not _ANSWER_PATTERN.fullmatch(answer):
             st.error("❌ **Please enter a valid number (digits only, negative numbers allowed).**")
             self._handle_failed_attempt()
             return
             
-        # Check if answer is correct
-        try:
-            if int(user_answer.strip()) == st.session_state.captcha_answer:
-                st.session_state.captcha_verified = True
-                st.success("✅ **Verification successful!** You can now use the app.")
-                self._clear_captcha_data()
-                logger.info("CAPTCHA verification successful")
-                st.rerun()  # Refresh to show main app
-            else:
-                st.error("❌ **Incorrect answer.** Please try again.")
-                self._handle_failed_attempt()
-        except ValueError:
-            st.error("❌ **Invalid input format.** Please enter a number.")
+        # Check if answer is correct; the bounded pattern guarantees int() succeeds
+        if int(answer) == st.session_state.captcha_answer:
+            st.session_state.captcha_verified = True
+            st.success("✅ **Verification successful!** You can now use the app.")
+            self._clear_captcha_data()
+            logger.info("CAPTCHA verification successful")
+            st.rerun()  # Refresh to show main app
+        else:
+            st.error("❌ **Incorrect answer.** Please try again.")
             self._handle_failed_attempt()
 
 
@@ -113,6 +121,12 @@ class StreamlitCaptcha:
             st.write("No more attempts available. Please solve this puzzle.")
             logger.warning("CAPTCHA max attempts reached")
 
+    def _skip_captcha(self) -> None:
+        """Replace the current problem with a new one, using up one attempt."""
+        st.session_state.captcha_attempts += 1
+        self._generate_captcha()
+        logger.info(f"CAPTCHA skipped, attempts: {st.session_state.captcha_attempts}/{self.max_attempts}")
+
     def _clear_captcha_data(self) -> None:
         """Clear CAPTCHA-related session state data."""
         captcha_keys = ['captcha_question', 'captcha_answer', 'captcha_attempts', 'button_assignment']
@@ -124,7 +138,7 @@ class StreamlitCaptcha:
     def display_captcha(self) -> None:
         """Display CAPTCHA using standard Streamlit components in a clean, centered form."""
         # Center the CAPTCHA form on the page
-        col1, col2, col3 = st.columns([1, 2, 1])
+        col1, col2, col3 = st.columns(CENTERED_COLUMN_RATIO)
         
         with col2:
             # Create a bordered container for the CAPTCHA
@@ -140,12 +154,9 @@ class StreamlitCaptcha:
                 remaining_skips = self.max_attempts - st.session_state.captcha_attempts
                 if remaining_skips > 0:
                     skip_button_label = f"🎲 Skip and Get New Problem ({remaining_skips} remaining)"
-                    if st.button(skip_button_label, type="secondary", width="stretch"):
-                        st.session_state.captcha_attempts += 1
-                        self._generate_captcha()
-                        logger.info(f"CAPTCHA skipped, attempts: {st.session_state.captcha_attempts}/{self.max_attempts}")
-                        st.rerun()
-                        return
+                    # The callback runs before the next script run, so the new problem
+                    # renders in that run instead of needing a second st.rerun()
+                    st.button(skip_button_label, type="secondary", width="stretch", on_click=self._skip_captcha)
                     st.divider()
                 else:
                     st.warning("⚠️ **No more skips available.** Please solve this puzzle.")
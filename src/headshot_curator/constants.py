@@ -10,18 +10,32 @@ SUPPORTED_MIME_TYPES: List[str] = ["image/png", "image/jpeg", "image/jpg"]
 CONFIG_FILE: str = "config.toml"
 INSTRUCTIONS_FILE: str = "instructions.md"
 CASCADE_FILE_DEFAULT: str = "haarcascade_frontalface_default.xml"
+YUNET_MODEL_FILE_DEFAULT: str = "models/face_detection_yunet_2023mar.onnx"
 
 # Image processing defaults
+# Longest edge (px) kept in memory for uploaded and sample images
+MAX_IMAGE_DIMENSION: int = 2048
+# JPEG quality of on-screen previews (matches Streamlit's own st.image encoding)
+DISPLAY_JPEG_QUALITY: int = 90
 DEFAULT_FACE_DETECTION_PARAMS = {
-    "scaleFactor": 1.1,
-    "minNeighbors": 5,
-    "minSize": (30, 30)
+    "scaleFactor": 1.2,
+    "minNeighbors": 4,
+    "minSize": (40, 40)
 }
+# Haar search starts at faces this many times smaller than the short edge
+FACE_MIN_SIZE_DIVISOR: int = 8
+SUPPORTED_FACE_DETECTORS: List[str] = ["haar", "yunet"]
+DEFAULT_FACE_DETECTOR: str = "haar"
+# Rendered headshots kept per image so revisited settings skip reprocessing
+RENDER_CACHE_MAX_ENTRIES: int = 16
+# Long edge (px) the grayscale image is shrunk to before face detection
+FACE_DETECTION_MAX_SIDE: int = 640
 
 # UI Constants
 PROFILE_COLUMN_RATIO: List[int] = [2, 1]
 IMAGE_DISPLAY_COLUMNS: int = 2
 DOWNLOAD_FORMAT_COLUMNS: List[int] = [1, 2]
+CENTERED_COLUMN_RATIO: List[int] = [1, 2, 1]
 
 # Logging
 LOG_FORMAT: str = (
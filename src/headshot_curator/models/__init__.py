@@ -1,6 +1,6 @@
 """Data models for the headshot generator application."""
 
-from .image_data import ImageData
+from .image_data import ImageData, decode_sample_image
 from .session_state import SessionState
 
-__all__ = ["ImageData", "SessionState"]
\ No newline at end of file
+__all__ = ["ImageData", "SessionState", "decode_sample_image"]
\ No newline at end of file
@@ -1,7 +1,11 @@
 """ImageData model for managing image state and metadata."""
 
+import io
+import math
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from typing import Optional, Tuple, Dict, Any
+from functools import lru_cache
+from typing import Optional, Tuple, Dict, Any, Hashable
 from pathlib import Path
 import datetime
 
@@ -9,12 +13,73 @@ from PIL import Image
 
 from ..utils.exceptions import ValidationError, ImageProcessingError
 from ..utils.logger import get_logger
-from ..constants import SUPPORTED_IMAGE_TYPES, SUPPORTED_MIME_TYPES
+from ..constants import SUPPORTED_IMAGE_TYPES, SUPPORTED_MIME_TYPES, MAX_IMAGE_DIMENSION, RENDER_CACHE_MAX_ENTRIES
 
 logger = get_logger(__name__)
 
 
-@dataclass
+def _decode_for_memory(source: Image.Image) -> Image.Image:
+    """
+    Decode an opened image to RGB no larger than MAX_IMAGE_DIMENSION.
+    
+    JPEGs decode at a reduced DCT scale and are already RGB, so they are shrunk
+    in place before the one copy out of the source instead of being copied at
+    full size by convert() first.
+    
+    Args:
+        source: Image opened from the file, validated but not yet loaded
+        
+    Returns:
+        A new RGB image independent of the source, without EXIF/ICC metadata
+    """
+    header_size = source.size
+    # draft() only picks a DCT scale whose result covers the requested size on
+    # both axes, so ask for the aspect-preserving fit rather than a square
+    fit = min(1.0, MAX_IMAGE_DIMENSION / max(header_size))
+    source.draft("RGB", (math.ceil(header_size[0] * fit), math.ceil(header_size[1] * fit)))
+    if source.size != header_size:
+        logger.info(f"Decoding at reduced DCT scale: {header_size[0]}x{header_size[1]} -> {source.size[0]}x{source.size[1]}")
+    image = source if source.mode == "RGB" else source.convert("RGB")
+    
+    # Memory optimization: Resize large images for cloud deployment
+    image = ImageData._optimize_image_for_memory(image)
+    if image is source:
+        # Closing the source destroys its pixels, so detach what we keep
+        image = source.copy()
+    
+    # The app never reads EXIF/ICC blobs; keep only pixels
+    image.info.clear()
+    return image
+
+
+@lru_cache(maxsize=16)
+def decode_sample_image(image_path: str, mtime_ns: int) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    Decode and downscale a sample image once per path and modification time.
+    
+    The returned image is shared by every caller; copy it before handing it to
+    anything that may close it.
+    
+    Args:
+        image_path: Path to the sample image file
+        mtime_ns: File modification time, so edited samples are decoded again
+        
+    Returns:
+        The memory-optimized RGB image and the source dimensions
+    """
+    # The file handle closes once pixels are decoded
+    with Image.open(image_path) as source:
+        # Validate image dimensions
+        width, height = source.size
+        if width < 100 or height < 100:
+            logger.warning(f"Sample image is quite small: {width}x{height}")
+        
+        image = _decode_for_memory(source)
+    
+    return image, (width, height)
+
+
+@dataclass(slots=True)
 class ImageData:
     """Manages image data, metadata, and validation."""
     
@@ -28,6 +93,17 @@ class ImageData:
     processing_params: Dict[str, Any] = field(default_factory=dict)
     upload_time: Optional[datetime.datetime] = None
     processing_time: Optional[datetime.datetime] = None
+    # Face boxes (x, y, w, h) found in original_image; None until detection has run
+    detected_faces: Optional[Tuple[Tuple[int, int, int, int], ...]] = None
+    # Processing cache key that produced processed_image
+    processing_cache_key: Optional[Hashable] = None
+    # Recently rendered headshots keyed by processing cache key, oldest first
+    render_cache: "OrderedDict[Hashable, Image.Image]" = field(default_factory=OrderedDict)
+    # Encoded bytes of processed_image keyed by save options; reset when it changes
+    encoded_cache: Dict[Tuple, bytes] = field(default_factory=dict)
+    # Display-size JPEG previews handed to st.image so reruns skip resizing and re-encoding
+    original_preview: Optional[bytes] = None
+    processed_preview: Optional[bytes] = None
     # Sample image fields
     is_sample: bool = False
     sample_display_name: Optional[str] = None
@@ -75,26 +151,25 @@ class ImageData:
             )
         
         try:
-            # Load and validate image
-            image = Image.open(uploaded_file).convert("RGB")
+            # Read the header only; dimensions are validated before any pixels are decoded
+            with Image.open(uploaded_file) as source:
+                # Validate image dimensions
+                width, height = source.size
+                if width < 100 or height < 100:
+                    raise ValidationError(
+                        f"Image too small: {width}x{height}",
+                        "Please upload an image that is at least 100x100 pixels."
+                    )
+                
+                if width > 10000 or height > 10000:
+                    raise ValidationError(
+                        f"Image too large: {width}x{height}",
+                        "Please upload an image smaller than 10000x10000 pixels."
+                    )
+                
+                image = _decode_for_memory(source)
             
-            # Validate image dimensions
-            width, height = image.size
-            if width < 100 or height < 100:
-                raise ValidationError(
-                    f"Image too small: {width}x{height}",
-                    "Please upload an image that is at least 100x100 pixels."
-                )
-            
-            if width > 10000 or height > 10000:
-                raise ValidationError(
-                    f"Image too large: {width}x{height}",
-                    "Please upload an image smaller than 10000x10000 pixels."
-                )
-            
-            # Memory optimization: Resize large images for cloud deployment
             original_size = (width, height)
-            image = cls._optimize_image_for_memory(image)
             
             logger.info(f"Successfully loaded image: {uploaded_file.name} ({width}x{height})")
             
@@ -142,16 +217,10 @@ class ImageData:
                     "The selected sample image is not available."
                 )
             
-            # Load and validate image
-            image = Image.open(image_path).convert("RGB")
-            
-            # Validate image dimensions
-            width, height = image.size
-            if width < 100 or height < 100:
-                logger.warning(f"Sample image is quite small: {width}x{height}")
-            
-            # Memory optimization: Resize large images for cloud deployment
-            image = cls._optimize_image_for_memory(image)
+            # Samples ship with the app, so each is decoded once per file version;
+            # every selection gets its own copy because clear() closes images
+            cached_image, (width, height) = decode_sample_image(str(image_path), image_path.stat().st_mtime_ns)
+            image = cached_image.copy()
             
             logger.info(f"Successfully loaded sample image: {display_name} ({width}x{height})")
             
@@ -188,13 +257,82 @@ class ImageData:
             processed_image: The processed PIL Image
             processing_params: Parameters used for processing
         """
+        previous = self.processed_image
         self.processed_image = processed_image
+        if previous is not None:
+            self._close_if_unused(previous)
         self.processed_dimensions = processed_image.size
+        self.encoded_cache.clear()
+        self.processed_preview = None
         self.processing_params = processing_params.copy()
         self.processing_time = datetime.datetime.now()
         
         logger.info(f"Processed image set: {self.processed_dimensions}")
     
+    def get_cached_render(self, cache_key: Hashable) -> Optional[Image.Image]:
+        """
+        Get a previously rendered headshot for these processing parameters.
+        
+        Args:
+            cache_key: Processing cache key for the parameters
+            
+        Returns:
+            The cached PIL Image, or None if it has not been rendered recently
+        """
+        image = self.render_cache.get(cache_key)
+        if image is not None:
+            self.render_cache.move_to_end(cache_key)
+        return image
+    
+    def cache_render(self, cache_key: Hashable, image: Image.Image) -> None:
+        """
+        Remember a rendered headshot, evicting the least recently used beyond the limit.
+        
+        Args:
+            cache_key: Processing cache key for the parameters
+            image: The rendered PIL Image
+        """
+        self.render_cache[cache_key] = image
+        self.render_cache.move_to_end(cache_key)
+        while len(self.render_cache) > RENDER_CACHE_MAX_ENTRIES:
+            _, evicted = self.render_cache.popitem(last=False)
+            self._close_if_unused(evicted)
+    
+    def _close_if_unused(self, image: Image.Image) -> None:
+        """Close an image once no field or render cache entry still holds it."""
+        if image is self.original_image or image is self.processed_image:
+            return
+        if any(image is cached for cached in self.render_cache.values()):
+            return
+        image.close()
+    
+    def get_encoded_processed_image(self, save_kwargs: Dict[str, Any]) -> bytes:
+        """
+        Encode the processed image for download, reusing the bytes until it changes.
+        
+        Args:
+            save_kwargs: Keyword arguments for PIL Image.save (format, quality, ...)
+            
+        Returns:
+            Encoded image bytes
+            
+        Raises:
+            ValidationError: If there is no processed image
+        """
+        if self.processed_image is None:
+            raise ValidationError(
+                "No processed image available",
+                "Please process an image before downloading."
+            )
+        
+        key = tuple(sorted(save_kwargs.items()))
+        if key not in self.encoded_cache:
+            buffer = io.BytesIO()
+            self.processed_image.save(buffer, **save_kwargs)
+            self.encoded_cache[key] = buffer.getvalue()
+        
+        return self.encoded_cache[key]
+    
     def validate_for_processing(self) -> None:
         """
         Validate that the image data is ready for processing.
@@ -249,9 +387,23 @@ class ImageData:
         }
     
     def clear(self) -> None:
-        """Clear all image data."""
+        """
+        Clear all image data, closing every held image.
+        
+        Images previously returned from this instance are unusable afterwards.
+        """
+        held = [self.original_image, self.processed_image, *self.render_cache.values()]
+        for image in {id(image): image for image in held if image is not None}.values():
+            image.close()
+        
         self.original_image = None
         self.processed_image = None
+        self.detected_faces = None
+        self.processing_cache_key = None
+        self.render_cache.clear()
+        self.encoded_cache.clear()
+        self.original_preview = None
+        self.processed_preview = None
         self.filename = None
         self.file_size = None
         self.original_dimensions = None
@@ -266,12 +418,12 @@ class ImageData:
         logger.info("Image data cleared")
     
     @staticmethod
-    def _optimize_image_for_memory(image: Image.Image, max_dimension: int = 2048) -> Image.Image:
+    def _optimize_image_for_memory(image: Image.Image, max_dimension: int = MAX_IMAGE_DIMENSION) -> Image.Image:
         """
         Optimize image for memory usage by resizing if too large.
         
         Args:
-            image: PIL Image to optimize
+            image: PIL Image to optimize; resized in place
             max_dimension: Maximum width or height (default: 2048px)
             
         Returns:
@@ -285,20 +437,16 @@ class ImageData:
             logger.info(f"Image size OK for memory: {width}x{height}")
             return image
         
-        # Calculate new dimensions maintaining aspect ratio
-        if width > height:
-            new_width = max_dimension
-            new_height = int((height * max_dimension) / width)
-        else:
-            new_height = max_dimension
-            new_width = int((width * max_dimension) / height)
-        
-        # Resize using high-quality resampling
-        resized_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Resize in place, keeping aspect ratio; reducing_gap box-reduces large ratios before LANCZOS.
+        # From 3x down, box-average by the whole factor and leave LANCZOS only the fractional tail
+        ratio = max(width, height) / max_dimension
+        reducing_gap = 1.0 if ratio >= 3 else 2.0
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS, reducing_gap=reducing_gap)
         
+        new_width, new_height = image.size
         new_pixels = new_width * new_height
         reduction_percent = ((original_pixels - new_pixels) / original_pixels) * 100
         
         logger.info(f"Image resized for memory optimization: {width}x{height} -> {new_width}x{new_height} ({reduction_percent:.1f}% reduction)")
         
-        return resized_image
+        return image
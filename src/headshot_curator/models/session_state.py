@@ -100,7 +100,7 @@ class SessionState:
         for key, value in kwargs.items():
             if hasattr(self.processing_params, key):
                 setattr(self.processing_params, key, value)
-                logger.debug(f"Updated processing param {key}: {value}")
+                logger.debug("Updated processing param {}: {}", key, value)
             else:
                 logger.warning(f"Unknown processing parameter: {key}")
     
@@ -172,7 +172,7 @@ class SessionState:
     def toggle_instructions(self) -> None:
         """Toggle the instructions display state."""
         self.show_instructions = not self.show_instructions
-        logger.debug(f"Instructions visibility: {self.show_instructions}")
+        logger.debug("Instructions visibility: {}", self.show_instructions)
     
     def set_error(self, error_message: str) -> None:
         """
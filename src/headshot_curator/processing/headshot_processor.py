@@ -1,58 +1,156 @@
 """Enhanced headshot processing with OpenCV face detection and PIL image processing."""
 
+import threading
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple, Dict, Any
 
 import cv2
 import numpy as np
-from PIL import Image, ImageOps
+from PIL import Image, ImageColor, ImageOps
 
 from ..utils.exceptions import ImageProcessingError, FaceDetectionError, ValidationError
 from ..utils.logger import get_logger
-from ..constants import DEFAULT_FACE_DETECTION_PARAMS
+from ..constants import (
+    DEFAULT_FACE_DETECTION_PARAMS,
+    FACE_MIN_SIZE_DIVISOR,
+    DEFAULT_FACE_DETECTOR,
+    FACE_DETECTION_MAX_SIDE,
+    SUPPORTED_FACE_DETECTORS,
+    YUNET_MODEL_FILE_DEFAULT,
+)
 from ..models.image_data import ImageData
 
 logger = get_logger(__name__)
 
+# Detection mutates the detectors' internal buffers, so the shared instances are serialized
+_detector_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _load_cascade(cascade_path: str) -> cv2.CascadeClassifier:
+    """
+    Load and validate a Haar cascade once per process.
+    
+    Streamlit builds a new HeadshotProcessor on every rerun, so caching here keeps the
+    XML parse out of the interactive loop. Failures raise and are therefore not cached.
+    
+    Args:
+        cascade_path: Path to the Haar cascade XML file
+        
+    Returns:
+        Loaded cascade classifier shared by all processors
+        
+    Raises:
+        ImageProcessingError: If the cascade file is missing or cannot be loaded
+    """
+    if not Path(cascade_path).exists():
+        raise ImageProcessingError(
+            f"Haar cascade file not found: {cascade_path}",
+            "Face detection system is not properly configured. Please contact support."
+        )
+    
+    try:
+        face_cascade = cv2.CascadeClassifier(cascade_path)
+    except Exception as e:
+        raise ImageProcessingError(
+            f"Error loading cascade classifier: {e}",
+            "Face detection system encountered an error. Please contact support."
+        )
+    
+    if face_cascade.empty():
+        raise ImageProcessingError(
+            f"Failed to load cascade classifier: {cascade_path}",
+            "Face detection system failed to initialize. Please contact support."
+        )
+    
+    return face_cascade
+
+
+@lru_cache(maxsize=64)
+def _border_rgb(border_color: str) -> Tuple[int, int, int]:
+    """Parse a border colour string to an (r, g, b) tuple once per distinct colour."""
+    return ImageColor.getrgb(border_color)[:3]
+
+
+@lru_cache(maxsize=None)
+def _load_yunet(model_path: str) -> cv2.FaceDetectorYN:
+    """
+    Load the YuNet CNN face detector once per process.
+    
+    Args:
+        model_path: Path to the YuNet ONNX model
+        
+    Returns:
+        Face detector shared by all processors
+        
+    Raises:
+        ImageProcessingError: If the model cannot be loaded
+    """
+    try:
+        return cv2.FaceDetectorYN.create(model_path, "", (320, 320), score_threshold=0.6)
+    except Exception as e:
+        raise ImageProcessingError(
+            f"Error loading YuNet face detector: {e}",
+            "Face detection system encountered an error. Please contact support."
+        )
+
 
 class HeadshotProcessor:
     """Enhanced headshot processor with robust error handling and logging."""
     
-    def __init__(self, cascade_path: Optional[str] = None):
+    def __init__(
+        self,
+        cascade_path: Optional[str] = None,
+        detector: str = DEFAULT_FACE_DETECTOR,
+        yunet_model_path: str = YUNET_MODEL_FILE_DEFAULT,
+        scale_factor: float = DEFAULT_FACE_DETECTION_PARAMS["scaleFactor"],
+        min_neighbors: int = DEFAULT_FACE_DETECTION_PARAMS["minNeighbors"]
+    ):
         """
         Initialize the headshot processor.
         
         Args:
             cascade_path: Path to Haar cascade file. If None, uses OpenCV default.
+            detector: Face detector to use, "haar" or "yunet". YuNet falls back to
+                the Haar cascade when its model file is missing.
+            yunet_model_path: Path to the YuNet ONNX model
+            scale_factor: Haar pyramid step between window sizes; must be above 1
+            min_neighbors: Overlapping Haar hits needed to accept a face
         """
+        if detector not in SUPPORTED_FACE_DETECTORS:
+            raise ValidationError(
+                f"Unknown face detector: {detector}",
+                "Face detection is misconfigured. Please check the detection settings."
+            )
+        if scale_factor <= 1 or min_neighbors < 0:
+            raise ValidationError(
+                f"Invalid Haar parameters: scale_factor={scale_factor}, min_neighbors={min_neighbors}",
+                "Face detection is misconfigured. Please check the detection settings."
+            )
+        
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        
         self.cascade_path = cascade_path or (cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
         self._face_cascade = None
+        self._face_detector = None
         self._validate_cascade()
         
-        logger.info(f"HeadshotProcessor initialized with cascade: {self.cascade_path}")
+        if detector == "yunet":
+            if Path(yunet_model_path).exists():
+                self._face_detector = _load_yunet(yunet_model_path)
+            else:
+                logger.warning(f"YuNet model not found at {yunet_model_path}, using Haar cascade")
+        
+        if self._face_detector is not None:
+            logger.info(f"HeadshotProcessor initialized with YuNet model: {yunet_model_path}")
+        else:
+            logger.info(f"HeadshotProcessor initialized with cascade: {self.cascade_path}")
     
     def _validate_cascade(self) -> None:
         """Validate that the cascade file exists and is accessible."""
-        cascade_file = Path(self.cascade_path)
-        if not cascade_file.exists():
-            raise ImageProcessingError(
-                f"Haar cascade file not found: {self.cascade_path}",
-                "Face detection system is not properly configured. Please contact support."
-            )
-        
-        try:
-            self._face_cascade = cv2.CascadeClassifier(self.cascade_path)
-            if self._face_cascade.empty():
-                raise ImageProcessingError(
-                    f"Failed to load cascade classifier: {self.cascade_path}",
-                    "Face detection system failed to initialize. Please contact support."
-                )
-        except Exception as e:
-            raise ImageProcessingError(
-                f"Error loading cascade classifier: {e}",
-                "Face detection system encountered an error. Please contact support."
-            )
-        
+        self._face_cascade = _load_cascade(self.cascade_path)
         logger.debug("Cascade classifier validated and loaded")
     
     def process_image(
@@ -95,18 +193,12 @@ class HeadshotProcessor:
             shift_y = processing_params["shift_y"]
             grayscale = processing_params.get("grayscale", False)
             
-            logger.debug(f"Processing parameters: {processing_params}")
+            logger.debug("Processing parameters: {}", processing_params)
             
-            # Convert PIL image to OpenCV format
             input_image = image_data.original_image
-            img_array = np.array(input_image)
-            img_cv = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-            gray = cv2.cvtColor(img_cv, cv2.COLOR_BGR2GRAY)
-            
-            logger.debug(f"Image converted to OpenCV format: {img_cv.shape}")
             
-            # Detect faces
-            faces = self._detect_faces(gray)
+            # Face boxes depend only on the image, so slider changes reuse them
+            faces = self._get_faces(image_data)
             
             # Process based on face detection results
             if len(faces) == 0:
@@ -116,7 +208,7 @@ class HeadshotProcessor:
                 logger.info(f"Detected {len(faces)} face(s), using face-based crop")
                 face = faces[0]  # Use the first (largest) detected face
                 cropped = self._face_crop(
-                    input_image, img_cv, face, padding_ratios, 
+                    input_image, face, padding_ratios, 
                     target_size, zoom_out_factor, shift_x, shift_y
                 )
             
@@ -170,9 +262,43 @@ class HeadshotProcessor:
                 "Zoom out factor must be between 0.5 and 3.0."
             )
     
+    def _get_faces(self, image_data: ImageData) -> Tuple[Tuple[int, int, int, int], ...]:
+        """
+        Get face boxes for the image, running detection only on first use.
+        
+        Args:
+            image_data: ImageData whose original image is being processed
+            
+        Returns:
+            Tuple of (x, y, w, h) face boxes, cached on image_data
+        """
+        if image_data.detected_faces is None:
+            if self._face_detector is not None:
+                # YuNet is a colour CNN; feed it the RGB pixels (as BGR below)
+                detection_image = np.asarray(image_data.original_image)
+            else:
+                # The Haar cascade only needs luminance; let PIL produce the
+                # single-channel buffer directly instead of copying the RGB frame
+                detection_image = np.asarray(image_data.original_image.convert("L"))
+            
+            # Detect on a downscaled copy and map the boxes back to full resolution
+            scale = min(1.0, FACE_DETECTION_MAX_SIDE / max(detection_image.shape[:2]))
+            if scale < 1.0:
+                detection_image = cv2.resize(detection_image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            
+            if self._face_detector is not None:
+                faces = self._detect_faces_yunet(cv2.cvtColor(detection_image, cv2.COLOR_RGB2BGR))
+            else:
+                faces = self._detect_faces(detection_image)
+            image_data.detected_faces = tuple(tuple(int(v / scale) for v in face) for face in faces)
+        else:
+            logger.debug("Reusing cached face detection")
+        
+        return image_data.detected_faces
+    
     def _detect_faces(self, gray_image: np.ndarray) -> np.ndarray:
         """
-        Detect faces in the grayscale image.
+        Detect faces in the grayscale image with the Haar cascade.
         
         Args:
             gray_image: Grayscale image as numpy array
@@ -184,14 +310,20 @@ class HeadshotProcessor:
             FaceDetectionError: If face detection fails
         """
         try:
-            faces = self._face_cascade.detectMultiScale(
-                gray_image,
-                scaleFactor=DEFAULT_FACE_DETECTION_PARAMS["scaleFactor"],
-                minNeighbors=DEFAULT_FACE_DETECTION_PARAMS["minNeighbors"],
-                minSize=DEFAULT_FACE_DETECTION_PARAMS["minSize"]
-            )
+            # Headshot faces are large, so skip windows far smaller than the photo
+            short_edge = min(gray_image.shape[:2])
+            min_side = max(DEFAULT_FACE_DETECTION_PARAMS["minSize"][0], short_edge // FACE_MIN_SIZE_DIVISOR)
+            with _detector_lock:
+                faces = self._face_cascade.detectMultiScale(
+                    gray_image,
+                    scaleFactor=self.scale_factor,
+                    minNeighbors=self.min_neighbors,
+                    minSize=(min_side, min_side),
+                    maxSize=(short_edge, short_edge),
+                    flags=cv2.CASCADE_SCALE_IMAGE
+                )
             
-            logger.debug(f"Face detection completed: {len(faces)} faces found")
+            logger.debug("Face detection completed: {} faces found", len(faces))
             return faces
             
         except Exception as e:
@@ -201,6 +333,37 @@ class HeadshotProcessor:
                 "Face detection failed. Please ensure the image contains a clear face and try again."
             )
     
+    def _detect_faces_yunet(self, bgr_image: np.ndarray) -> np.ndarray:
+        """
+        Detect faces in the colour image with YuNet.
+        
+        Args:
+            bgr_image: 3-channel BGR image as numpy array
+            
+        Returns:
+            Array of (x, y, w, h) face boxes
+            
+        Raises:
+            FaceDetectionError: If face detection fails
+        """
+        try:
+            with _detector_lock:
+                self._face_detector.setInputSize((bgr_image.shape[1], bgr_image.shape[0]))
+                _, faces = self._face_detector.detect(bgr_image)
+        except Exception as e:
+            logger.error(f"Face detection failed: {e}")
+            raise FaceDetectionError(
+                f"Face detection error: {e}",
+                "Face detection failed. Please ensure the image contains a clear face and try again."
+            )
+        
+        if faces is None:
+            logger.debug("Face detection completed: 0 faces found")
+            return np.empty((0, 4), dtype=np.int32)
+        
+        logger.debug("Face detection completed: {} faces found", len(faces))
+        return faces[:, :4].astype(np.int32)
+    
     def _convert_to_grayscale(self, image: Image.Image) -> Image.Image:
         """Convert a PIL image to grayscale while preserving 3-channel mode for consistent saving."""
         # Convert to grayscale (single channel)
@@ -245,7 +408,6 @@ class HeadshotProcessor:
     def _face_crop(
         self,
         image: Image.Image,
-        img_cv: np.ndarray,
         face: Tuple[int, int, int, int],
         padding_ratios: Dict[str, float],
         target_size: Tuple[int, int],
@@ -272,7 +434,7 @@ class HeadshotProcessor:
         crop_bottom = crop_top + crop_height
         
         # Constrain to image bounds
-        img_height, img_width = img_cv.shape[:2]
+        img_width, img_height = image.size
         crop_left, crop_top, crop_right, crop_bottom = self._constrain_crop_bounds(
             crop_left, crop_top, crop_right, crop_bottom, img_width, img_height
         )
@@ -301,27 +463,18 @@ class HeadshotProcessor:
         img_width: int, img_height: int
     ) -> Tuple[int, int, int, int]:
         """Constrain crop bounds to image dimensions."""
-        # Adjust for bounds
-        if left < 0:
-            right -= left
-            left = 0
-        if top < 0:
-            bottom -= top
-            top = 0
-        if right > img_width:
-            left -= (right - img_width)
-            right = img_width
-        if bottom > img_height:
-            top -= (bottom - img_height)
-            bottom = img_height
-        
-        # Final bounds check
-        left = max(0, left)
-        top = max(0, top)
-        right = min(img_width, right)
-        bottom = min(img_height, bottom)
-        
-        return left, top, right, bottom
+        # Shift the box back inside the image (past the top-left first, then the
+        # bottom-right), then clip whatever still overflows
+        shift = max(0, -left)
+        left, right = left + shift, right + shift
+        shift = max(0, -top)
+        top, bottom = top + shift, bottom + shift
+        shift = max(0, right - img_width)
+        left, right = left - shift, right - shift
+        shift = max(0, bottom - img_height)
+        top, bottom = top - shift, bottom - shift
+        
+        return max(0, left), max(0, top), min(img_width, right), min(img_height, bottom)
     
     def _finalize_image(
         self,
@@ -342,19 +495,22 @@ class HeadshotProcessor:
         new_width = int(crop_width * scale_factor)
         new_height = int(crop_height * scale_factor)
         
-        # Resize the image maintaining aspect ratio
-        resized_img = cropped.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        # Create a new image with the target size and border color background
-        final_img = Image.new('RGB', target_size, border_color)
-        
         # Calculate position to center the resized image
         paste_x = (target_width - new_width) // 2
         paste_y = (target_height - new_height) // 2
         
-        # Paste the resized image onto the background
-        final_img.paste(resized_img, (paste_x, paste_y))
+        # Resize with OpenCV straight into a border-coloured canvas, skipping the
+        # intermediate PIL resize and paste (area averaging when shrinking, Lanczos when enlarging)
+        canvas = np.full((target_height, target_width, 3), _border_rgb(border_color), np.uint8)
+        cv2.resize(
+            # Crops of original_image are always RGB, so no convert() copy is needed
+            np.asarray(cropped),
+            (new_width, new_height),
+            dst=canvas[paste_y:paste_y + new_height, paste_x:paste_x + new_width],
+            interpolation=cv2.INTER_AREA if scale_factor < 1 else cv2.INTER_LANCZOS4
+        )
+        final_img = Image.fromarray(canvas)
         
-        logger.debug(f"Image finalized: {cropped.size} -> {resized_img.size} -> {final_img.size}")
+        logger.debug("Image finalized: {} -> {} -> {}", cropped.size, (new_width, new_height), final_img.size)
         
         return final_img
@@ -1,10 +1,8 @@
 """Main HeadshotApp class for orchestrating the application."""
 
 import io
-import hashlib
-import json
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Dict, Any, Tuple
 
 import streamlit as st
 from PIL import Image
@@ -12,7 +10,17 @@ from PIL import Image
 from ..utils.config import ConfigManager
 from ..utils.logger import setup_logger, get_logger
 from ..utils.exceptions import HeadshotGeneratorError
-from ..constants import PROFILE_COLUMN_RATIO, INSTRUCTIONS_FILE
+from ..constants import (
+    PROFILE_COLUMN_RATIO,
+    IMAGE_DISPLAY_COLUMNS,
+    DOWNLOAD_FORMAT_COLUMNS,
+    CENTERED_COLUMN_RATIO,
+    INSTRUCTIONS_FILE,
+    DEFAULT_FACE_DETECTOR,
+    DISPLAY_JPEG_QUALITY,
+    DEFAULT_FACE_DETECTION_PARAMS,
+    YUNET_MODEL_FILE_DEFAULT,
+)
 from ..models.image_data import ImageData
 from ..models.session_state import SessionState, ProcessingParameters
 from ..processing.headshot_processor import HeadshotProcessor
@@ -24,6 +32,33 @@ from .sidebar import Sidebar
 setup_logger(log_level="INFO", log_file="logs/headshot_app.log")
 logger = get_logger(__name__)
 
+# Processing parameters that change the rendered headshot, with defaults for missing keys
+PROCESSING_CACHE_KEY_PARAMS: Tuple[Tuple[str, Any], ...] = (
+    ('target_width', None),
+    ('target_height', None),
+    ('padding_top_ratio', None),
+    ('padding_bottom_ratio', None),
+    ('padding_side_ratio', None),
+    ('shift_x', None),
+    ('shift_y', None),
+    ('zoom_out_factor', None),
+    ('border_color', None),
+    ('grayscale', False),
+)
+
+
+@st.cache_resource
+def _load_config_manager() -> ConfigManager:
+    """Parse config.toml once per process instead of on every rerun."""
+    return ConfigManager()
+
+
+@st.cache_data(show_spinner=False)
+def _load_instructions(path: str, mtime_ns: int) -> str:
+    """Read the instructions markdown once per file version instead of on every rerun."""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
 
 class HeadshotApp:
     """Main application class for the Headshot Generator."""
@@ -34,8 +69,14 @@ class HeadshotApp:
         
         try:
             # Initialize components
-            self.config_manager = ConfigManager()
-            self.processor = HeadshotProcessor()
+            self.config_manager = _load_config_manager()
+            detection_config = self.config_manager.get("detection", {})
+            self.processor = HeadshotProcessor(
+                detector=detection_config.get("detector", DEFAULT_FACE_DETECTOR),
+                yunet_model_path=detection_config.get("yunet_model", YUNET_MODEL_FILE_DEFAULT),
+                scale_factor=detection_config.get("scale_factor", DEFAULT_FACE_DETECTION_PARAMS["scaleFactor"]),
+                min_neighbors=detection_config.get("min_neighbors", DEFAULT_FACE_DETECTION_PARAMS["minNeighbors"])
+            )
             self.sidebar = Sidebar(self.config_manager)
             self.sample_manager = SampleImageManager(self.config_manager)
             
@@ -81,6 +122,13 @@ class HeadshotApp:
         if "image_data" not in st.session_state:
             st.session_state.image_data = ImageData()
         
+        # Last-seen value of each image source, so an unchanged widget value on
+        # a rerun never reloads; whichever source changed most recently wins
+        if "last_upload_key" not in st.session_state:
+            st.session_state.last_upload_key = None
+        if "last_sample_path" not in st.session_state:
+            st.session_state.last_sample_path = None
+        
         # Initialize SessionState
         if "app_state" not in st.session_state:
             # Get default configuration
@@ -162,28 +210,18 @@ class HeadshotApp:
                 
                 # Handle file upload
                 if uploaded_file is not None:
-                    # Show temporary file size warning for large files
-                    if hasattr(uploaded_file, 'size') and uploaded_file.size:
-                        file_size_mb = uploaded_file.size / (1024 * 1024)
-                        max_size_mb = self.config_manager.get_ui_config('max_file_size_warning_mb') or 5.0
-                        
-                        if file_size_mb > max_size_mb:
-                            warning_template = self.config_manager.get_ui_config('labels.file_size_warning') or "⚠️ Large file detected: {size:.1f}MB. Image will be automatically optimised for better performance."
-                            warning_placeholder = st.empty()
-                            warning_placeholder.warning(warning_template.format(size=file_size_mb))
-                            
-                            # Clear warning after 3 seconds
-                            import time
-                            time.sleep(3)
-                            warning_placeholder.empty()
-                    
                     self._handle_file_upload(uploaded_file)
+                else:
+                    # Forget a removed upload so choosing the same file again reloads it
+                    st.session_state.last_upload_key = None
             
             with sample_tab:
                 # Render sample image selector
                 selected_sample_path = self.sample_manager.render_sample_selector()
                 if selected_sample_path:
                     self._handle_sample_image_selection(selected_sample_path)
+                else:
+                    st.session_state.last_sample_path = None
         
         with col2:
             profile_label = self.config_manager.get_ui_config('labels.profile_selector') or "Profile:"
@@ -193,11 +231,31 @@ class HeadshotApp:
     def _handle_file_upload(self, uploaded_file) -> None:
         """Handle file upload and validation."""
         try:
-            # Create new ImageData from uploaded file
+            # Every rerun sees the same upload; Streamlit gives each new upload its
+            # own file_id, so only load when that changes
+            upload_key = uploaded_file.file_id
+            if st.session_state.last_upload_key == upload_key:
+                return
+            
+            # Create new ImageData from uploaded file; a rejected file raises here
+            # and leaves the current image untouched
             new_image_data = ImageData.from_uploaded_file(uploaded_file)
             
-            # Update session state
+            # Release the previous image and its caches, then update session state
+            st.session_state.image_data.clear()
             st.session_state.image_data = new_image_data
+            # Only a successful load is remembered, so a rejected file keeps its error
+            st.session_state.last_upload_key = upload_key
+            
+            # Show temporary file size warning for large files; a toast dismisses
+            # itself in the browser instead of holding up the rerun
+            if hasattr(uploaded_file, 'size') and uploaded_file.size:
+                file_size_mb = uploaded_file.size / (1024 * 1024)
+                max_size_mb = self.config_manager.get_ui_config('max_file_size_warning_mb') or 5.0
+                
+                if file_size_mb > max_size_mb:
+                    warning_template = self.config_manager.get_ui_config('labels.file_size_warning') or "⚠️ Large file detected: {size:.1f}MB. Image will be automatically optimised for better performance."
+                    st.toast(warning_template.format(size=file_size_mb))
             
             # Process the image immediately with current settings
             self._process_current_image()
@@ -219,6 +277,10 @@ class HeadshotApp:
             sample_path: Path to the selected sample image
         """
         try:
+            # The selector keeps returning the same path on every rerun
+            if st.session_state.last_sample_path == sample_path:
+                return
+            
             # Get sample images to find display name
             sample_images = self.sample_manager.get_sample_images()
             selected_sample = next(
@@ -230,14 +292,16 @@ class HeadshotApp:
                 st.error("Selected sample image not found.")
                 return
             
-            # Create new ImageData from sample
+            # Create new ImageData from sample; on failure the current image stays
             new_image_data = ImageData.from_sample_image(
                 sample_path, 
                 selected_sample['display_name']
             )
             
-            # Update session state
+            # Release the previous image and its caches, then update session state
+            st.session_state.image_data.clear()
             st.session_state.image_data = new_image_data
+            st.session_state.last_sample_path = sample_path
             
             # Process the image immediately with current settings
             self._process_current_image()
@@ -340,54 +404,67 @@ class HeadshotApp:
     
     def _handle_parameter_changes(self, current_params: Dict[str, Any]) -> None:
         """Handle parameter changes from the sidebar with intelligent caching."""
-        if self.sidebar.has_parameter_changes(current_params, st.session_state.app_state):
+        image_data = st.session_state.image_data
+        app_state = st.session_state.app_state
+        
+        if self.sidebar.has_parameter_changes(current_params, app_state):
             # Update session state
-            st.session_state.app_state.update_processing_params(**current_params)
+            app_state.update_processing_params(**current_params)
             
             # If in Custom mode, update the custom_params to persist changes
-            if st.session_state.app_state.selected_preset == "Custom":
+            if app_state.selected_preset == "Custom":
                 # Update custom params with current changes
-                st.session_state.app_state.custom_params = ProcessingParameters.from_config(current_params)
+                app_state.custom_params = ProcessingParameters.from_config(current_params)
                 logger.info("Updated custom parameters with manual changes")
             else:
                 # Set preset to Custom since manual changes were made to a standard preset
-                st.session_state.app_state.set_preset("Custom")
+                app_state.set_preset("Custom")
                 # Save the modified parameters as custom
-                st.session_state.app_state.custom_params = ProcessingParameters.from_config(current_params)
+                app_state.custom_params = ProcessingParameters.from_config(current_params)
             
-            # Only reprocess image if available and if processing parameters actually changed
-            # (not just UI state changes)
-            if (st.session_state.image_data.original_image is not None and 
-                self._processing_parameters_changed(current_params)):
+            # Reprocess if an image is loaded; _process_current_image compares the
+            # cache key first, so UI-only changes stop at one tuple comparison
+            if image_data.original_image is not None:
                 self._process_current_image()
     
     def _process_current_image(self) -> None:
         """Process the current image with current parameters and caching."""
+        image_data = st.session_state.image_data
+        app_state = st.session_state.app_state
+        
         try:
-            if st.session_state.image_data.original_image is None:
+            if image_data.original_image is None:
                 return
             
             # Get processing parameters
-            processing_params = st.session_state.app_state.get_processing_dict()
+            processing_params = app_state.get_processing_dict()
             
             # Create cache key from processing parameters
             cache_key = self._create_processing_cache_key(processing_params)
             
             # Check if we already have this exact processing result cached
-            if (hasattr(st.session_state.image_data, 'processing_cache_key') and 
-                st.session_state.image_data.processing_cache_key == cache_key and
-                st.session_state.image_data.processed_image is not None):
+            if (image_data.processing_cache_key == cache_key and
+                image_data.processed_image is not None):
                 logger.debug("Using cached processed image (parameters unchanged)")
                 return
             
+            # Revisiting earlier settings for this image is a lookup, not a reprocess
+            cached_image = image_data.get_cached_render(cache_key)
+            if cached_image is not None:
+                image_data.set_processed_image(cached_image, processing_params)
+                image_data.processing_cache_key = cache_key
+                logger.debug("Using cached processed image (previously rendered settings)")
+                return
+            
             # Process the image
             processed_image = self.processor.process_image(
-                st.session_state.image_data,
+                image_data,
                 processing_params
             )
             
-            # Cache the processing parameters
-            st.session_state.image_data.processing_cache_key = cache_key
+            # Cache the processing parameters and the render
+            image_data.processing_cache_key = cache_key
+            image_data.cache_render(cache_key, processed_image)
             
             logger.info("Image processed successfully and cached")
             
@@ -400,7 +477,9 @@ class HeadshotApp:
     
     def _render_image_display(self) -> None:
         """Render the image display section with memory optimization."""
-        col1, col2 = st.columns(2)
+        image_data = st.session_state.image_data
+        
+        col1, col2 = st.columns(IMAGE_DISPLAY_COLUMNS)
         
         # Get UI labels from config
         original_label = self.config_manager.get_ui_config('labels.original_image') or "Original Image"
@@ -412,13 +491,14 @@ class HeadshotApp:
         
         with col1:
             st.subheader(original_label)
-            if st.session_state.image_data.original_image is not None:
-                # Use optimized display size for better performance
-                display_image = self._optimize_image_for_display(
-                    st.session_state.image_data.original_image
-                )
+            if image_data.original_image is not None:
+                # Use optimized display size for better performance, encoded once per image
+                if image_data.original_preview is None:
+                    image_data.original_preview = self._encode_display_image(
+                        image_data.original_image
+                    )
                 st.image(
-                    display_image,
+                    image_data.original_preview,
                     caption=original_caption,
                     width="stretch"  # Updated from deprecated use_container_width
                 )
@@ -427,23 +507,32 @@ class HeadshotApp:
         
         with col2:
             st.subheader(processed_label)
-            if st.session_state.image_data.processed_image is not None:
-                # Use optimized display size for better performance
-                display_image = self._optimize_image_for_display(
-                    st.session_state.image_data.processed_image
-                )
+            if image_data.processed_image is not None:
+                # Use optimized display size for better performance, encoded once per render
+                if image_data.processed_preview is None:
+                    image_data.processed_preview = self._encode_display_image(
+                        image_data.processed_image
+                    )
                 st.image(
-                    display_image,
+                    image_data.processed_preview,
                     caption=processed_caption,
                     width="stretch"  # Updated from deprecated use_container_width
                 )
             else:
                 st.info(processed_prompt)
     
+    @st.fragment
     def _render_download_section(self) -> None:
-        """Render the download section with segmented control and editable filename."""
-        if (st.session_state.image_data.processed_image is not None and 
-            st.session_state.image_data.original_image is not None):
+        """
+        Render the download section with segmented control and editable filename.
+        
+        Runs as a fragment: format and filename edits only affect this section,
+        so they rerun it alone instead of the whole page.
+        """
+        image_data = st.session_state.image_data
+        
+        if (image_data.processed_image is not None and 
+            image_data.original_image is not None):
             
             st.markdown("---")
             section_title = self.config_manager.get_ui_config('labels.download_section') or "💾 Download Headshot"
@@ -454,7 +543,7 @@ class HeadshotApp:
                 formats = self.config_manager.get_download_formats()
                 
                 if formats:
-                    col1, col2 = st.columns([1, 2])
+                    col1, col2 = st.columns(DOWNLOAD_FORMAT_COLUMNS)
                     
                     with col1:
                         format_label = self.config_manager.get_ui_config('labels.download_format') or "Format:"
@@ -516,9 +605,11 @@ class HeadshotApp:
     
     def _render_download_button(self, format_key: str, format_info: Dict[str, Any]) -> None:
         """Render download button for specific format."""
+        image_data = st.session_state.image_data
+        app_state = st.session_state.app_state
+        
         try:
-            # Generate image buffer
-            buffer = io.BytesIO()
+            # Encode once per processed image and format, not on every rerun
             save_kwargs = {"format": format_info["format"]}
             
             if format_info.get("quality"):
@@ -526,16 +617,16 @@ class HeadshotApp:
             if format_info.get("optimize"):
                 save_kwargs["optimize"] = format_info["optimize"]
             
-            st.session_state.image_data.processed_image.save(buffer, **save_kwargs)
+            image_bytes = image_data.get_encoded_processed_image(save_kwargs)
             
             # Generate dynamic filename based on preset and grayscale setting
-            preset_name = st.session_state.app_state.selected_preset.lower()
-            grayscale_suffix = "_bw" if st.session_state.app_state.processing_params.grayscale else ""
+            preset_name = app_state.selected_preset.lower()
+            grayscale_suffix = "_bw" if app_state.processing_params.grayscale else ""
             filename = f"headshot_{preset_name}{grayscale_suffix}{format_info['extension']}"
             
             st.download_button(
                 label=f"💾 Download as {format_info['format'].upper()}",
-                data=buffer.getvalue(),
+                data=image_bytes,
                 file_name=filename,
                 mime=format_info["mime"],
                 help=f"Download the processed headshot as {format_info['format']} format (filename: {filename})",
@@ -548,20 +639,22 @@ class HeadshotApp:
     
     def _render_fallback_download(self) -> None:
         """Render fallback JPEG download."""
+        image_data = st.session_state.image_data
+        app_state = st.session_state.app_state
+        
         try:
-            buffer = io.BytesIO()
-            st.session_state.image_data.processed_image.save(buffer, format="JPEG")
+            image_bytes = image_data.get_encoded_processed_image({"format": "JPEG"})
             
             # Generate dynamic filename based on preset and grayscale setting
-            preset_name = st.session_state.app_state.selected_preset.lower()
-            grayscale_suffix = "_bw" if st.session_state.app_state.processing_params.grayscale else ""
+            preset_name = app_state.selected_preset.lower()
+            grayscale_suffix = "_bw" if app_state.processing_params.grayscale else ""
             filename = f"headshot_{preset_name}{grayscale_suffix}.jpg"
             
-            col1, col2, col3 = st.columns([1, 2, 1])
+            col1, col2, col3 = st.columns(CENTERED_COLUMN_RATIO)
             with col2:
                 st.download_button(
                     label="💾 Download Headshot",
-                    data=buffer.getvalue(),
+                    data=image_bytes,
                     file_name=filename,
                     mime="image/jpeg",
                     help=f"Download the processed headshot as a JPEG file (filename: {filename})",
@@ -571,27 +664,30 @@ class HeadshotApp:
             logger.error(f"Fallback download error: {e}")
             st.error("Error generating download file.")
     
+    @st.fragment
     def _render_instructions_section(self) -> None:
-        """Render the instructions toggle section."""
+        """Render the instructions toggle section as a self-contained fragment."""
         st.markdown("---")
-        col1, col2, col3 = st.columns([1, 2, 1])
+        col1, col2, col3 = st.columns(CENTERED_COLUMN_RATIO)
         
         with col2:
-            if st.button(
+            # Toggle in a callback so the label is already current when the
+            # fragment reruns, without a second explicit rerun
+            st.button(
                 "📝 Show Instructions" if not st.session_state.app_state.show_instructions else "🔼 Hide Instructions",
                 key="instructions_toggle",
+                on_click=st.session_state.app_state.toggle_instructions,
                 width="stretch"
-            ):
-                st.session_state.app_state.toggle_instructions()
-                st.rerun()
+            )
         
         # Display instructions if toggled on
         if st.session_state.app_state.show_instructions:
             try:
                 instructions_path = Path(INSTRUCTIONS_FILE)
                 if instructions_path.exists():
-                    with open(instructions_path, "r", encoding="utf-8") as f:
-                        instructions_content = f.read()
+                    instructions_content = _load_instructions(
+                        str(instructions_path), instructions_path.stat().st_mtime_ns
+                    )
                     st.markdown("")
                     st.markdown(instructions_content)
                 else:
@@ -600,6 +696,20 @@ class HeadshotApp:
                 logger.error(f"Instructions loading error: {e}")
                 st.error("Error loading instructions.")
     
+    def _encode_display_image(self, image: Image.Image) -> bytes:
+        """
+        Encode a display-size JPEG preview for st.image.
+        
+        Args:
+            image: PIL Image to preview
+            
+        Returns:
+            JPEG bytes at the quality Streamlit itself uses for previews
+        """
+        buffer = io.BytesIO()
+        self._optimize_image_for_display(image).save(buffer, format="JPEG", quality=DISPLAY_JPEG_QUALITY)
+        return buffer.getvalue()
+    
     def _optimize_image_for_display(self, image: Image.Image, max_display_size: int = 800) -> Image.Image:
         """
         Optimize image for display in Streamlit to reduce memory usage.
@@ -625,59 +735,15 @@ class HeadshotApp:
             new_height = max_display_size
             new_width = int((width * max_display_size) / height)
         
-        # Create display copy (don't modify original)
-        display_image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Create display copy (don't modify original). This is preview-only and runs on
+        # every rerun, so bilinear (~3x cheaper) is used; downloads keep the Lanczos render.
+        display_image = image.resize((new_width, new_height), Image.Resampling.BILINEAR)
         
-        logger.debug(f"Display image optimized: {width}x{height} -> {new_width}x{new_height}")
+        logger.debug("Display image optimized: {}x{} -> {}x{}", width, height, new_width, new_height)
         
         return display_image
     
-    def _processing_parameters_changed(self, current_params: Dict[str, Any]) -> bool:
-        """
-        Check if processing parameters have actually changed (not just UI state).
-        
-        Args:
-            current_params: Current parameter values from UI
-            
-        Returns:
-            True if processing parameters changed, False if only UI state changed
-        """
-        if not hasattr(st.session_state.image_data, 'processing_params'):
-            return True  # First time processing
-        
-        last_params = st.session_state.image_data.processing_params
-        
-        # Only check parameters that affect image processing (exclude UI-only params)
-        processing_keys = [
-            'target_width', 'target_height', 'padding_top', 'padding_bottom', 
-            'padding_side', 'shift_x', 'shift_y', 'zoom_out_factor', 
-            'border_color', 'grayscale'
-        ]
-        
-        # Convert current_params to processing format for comparison
-        current_processing = {
-            'target_width': current_params.get('target_width'),
-            'target_height': current_params.get('target_height'),
-            'padding_top_ratio': current_params.get('padding_top'),
-            'padding_bottom_ratio': current_params.get('padding_bottom'),
-            'padding_side_ratio': current_params.get('padding_side'),
-            'shift_x': current_params.get('shift_x'),
-            'shift_y': current_params.get('shift_y'),
-            'zoom_out_factor': current_params.get('zoom_out_factor'),
-            'border_color': current_params.get('border_color'),
-            'grayscale': current_params.get('grayscale', False)
-        }
-        
-        # Check if any processing parameter has changed
-        for key, value in current_processing.items():
-            if key in last_params and last_params[key] != value:
-                logger.debug(f"Processing parameter changed: {key} {last_params[key]} -> {value}")
-                return True
-                
-        logger.debug("No processing parameter changes detected, skipping reprocessing")
-        return False
-    
-    def _create_processing_cache_key(self, processing_params: Dict[str, Any]) -> str:
+    def _create_processing_cache_key(self, processing_params: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
         """
         Create a cache key from processing parameters to detect when reprocessing is needed.
         
@@ -685,31 +751,14 @@ class HeadshotApp:
             processing_params: Processing parameters dictionary
             
         Returns:
-            Cache key string
+            Hashable tuple of (name, value) pairs in a fixed order
         """
-        import hashlib
-        import json
-        
-        # Create a stable string representation of the parameters
-        # Only include parameters that affect image processing
-        cache_params = {
-            'target_width': processing_params.get('target_width'),
-            'target_height': processing_params.get('target_height'),
-            'padding_top_ratio': processing_params.get('padding_top_ratio'),
-            'padding_bottom_ratio': processing_params.get('padding_bottom_ratio'),
-            'padding_side_ratio': processing_params.get('padding_side_ratio'),
-            'shift_x': processing_params.get('shift_x'),
-            'shift_y': processing_params.get('shift_y'),
-            'zoom_out_factor': processing_params.get('zoom_out_factor'),
-            'border_color': processing_params.get('border_color'),
-            'grayscale': processing_params.get('grayscale', False)
-        }
-        
-        # Create a hash of the parameters for efficient comparison
-        params_str = json.dumps(cache_params, sort_keys=True)
-        cache_key = hashlib.md5(params_str.encode()).hexdigest()
-        
-        return cache_key
+        # Only include parameters that affect image processing. The tuple is
+        # compared and hashed directly, so no serialization is needed per rerun
+        return tuple(
+            (name, processing_params.get(name, default))
+            for name, default in PROCESSING_CACHE_KEY_PARAMS
+        )
     
     def _generate_filename(self, format_key: str, format_info: Dict[str, Any]) -> str:
         """
@@ -749,8 +798,7 @@ class HeadshotApp:
             filename: Custom filename
         """
         try:
-            # Generate image buffer
-            buffer = io.BytesIO()
+            # Encode once per processed image and format, not on every rerun
             save_kwargs = {"format": format_info["format"]}
             
             if format_info.get("quality"):
@@ -758,7 +806,7 @@ class HeadshotApp:
             if format_info.get("optimize"):
                 save_kwargs["optimize"] = format_info["optimize"]
             
-            st.session_state.image_data.processed_image.save(buffer, **save_kwargs)
+            image_bytes = st.session_state.image_data.get_encoded_processed_image(save_kwargs)
             
             # Get button label template from config
             button_template = self.config_manager.get_ui_config('labels.download_button') or "💾 Download as {format}"
@@ -766,7 +814,7 @@ class HeadshotApp:
             
             st.download_button(
                 label=button_label,
-                data=buffer.getvalue(),
+                data=image_bytes,
                 file_name=filename,
                 mime=format_info["mime"],
                 help=f"Download the processed headshot as {format_info['format']} format (filename: {filename})",
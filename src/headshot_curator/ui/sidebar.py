@@ -42,9 +42,19 @@ class Sidebar:
         # Get slider configuration
         slider_config = self.config_manager.get("slider", {})
         
+        # With live preview off the controls sit in a form, so a burst of slider
+        # changes reruns (and reprocesses) once on submit instead of per change
+        live_preview = st.sidebar.toggle(
+            "Live preview",
+            value=True,
+            help="Turn off to adjust several settings and apply them together.",
+            key="live_preview"
+        )
+        controls = st.sidebar.container() if live_preview else st.sidebar.form("controls", border=False)
+        
         # Dimensions section
-        st.sidebar.subheader("Dimensions")
-        with st.sidebar:
+        controls.subheader("Dimensions")
+        with controls:
             col1, col2 = st.columns(2)
             with col1:
                 target_width = st.slider(
@@ -68,8 +78,8 @@ class Sidebar:
                 )
         
         # Padding section
-        st.sidebar.subheader("Padding")
-        with st.sidebar:
+        controls.subheader("Padding")
+        with controls:
             col1, col2 = st.columns(2)
             with col1:
                 padding_top = st.slider(
@@ -102,8 +112,8 @@ class Sidebar:
                 )
         
         # Position & Zoom section
-        st.sidebar.subheader("Position & Zoom")
-        with st.sidebar:
+        controls.subheader("Position & Zoom")
+        with controls:
             col1, col2 = st.columns(2)
             with col1:
                 shift_x = st.slider(
@@ -136,21 +146,24 @@ class Sidebar:
                 )
         
         # Appearance section
-        st.sidebar.subheader("Appearance")
-        border_color = st.sidebar.color_picker(
+        controls.subheader("Appearance")
+        border_color = controls.color_picker(
             "Border Colour",
             params.border_color,
             help="Used when image doesn't match target aspect ratio",
             key="border_color"
         )
         
-        grayscale = st.sidebar.checkbox(
+        grayscale = controls.checkbox(
             "Black & White",
             value=params.grayscale,
             help="Convert the output image to grayscale (black and white)",
             key="grayscale"
         )
         
+        if not live_preview:
+            controls.form_submit_button("Apply", width="stretch")
+        
         # Collect all parameters (invert shift values for intuitive direction)
         updated_params = {
             "target_width": target_width,
@@ -172,7 +185,7 @@ class Sidebar:
         }
         
         if changed_params:
-            logger.debug(f"Sidebar parameter changes: {changed_params}")
+            logger.debug("Sidebar parameter changes: {}", changed_params)
         
         return updated_params, border_color
     
@@ -1,9 +1,8 @@
 """Configuration management for the headshot generator application."""
 
+import tomllib
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-import toml
+from typing import Any, Dict, List
 
 from .exceptions import ConfigurationError
 from .logger import get_logger
@@ -36,13 +35,13 @@ class ConfigManager:
                     "Please ensure it exists in the application directory."
                 )
             
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                self._config = toml.load(f)
+            with open(self.config_path, 'rb') as f:
+                self._config = tomllib.load(f)
             
             logger.info(f"Configuration loaded from {self.config_path}")
             self._validate_config()
             
-        except toml.TomlDecodeError as e:
+        except tomllib.TOMLDecodeError as e:
             raise ConfigurationError(
                 f"Failed to parse TOML configuration: {e}",
                 "Configuration file is invalid. Please check the syntax and try again."
@@ -100,7 +99,7 @@ class ConfigManager:
         Returns:
             List of preset names
         """
-        system_sections = {'slider', 'download_formats', 'ui'}
+        system_sections = {'slider', 'download_formats', 'ui', 'detection'}
         return [
             key.title() 
             for key in self._config.keys() 
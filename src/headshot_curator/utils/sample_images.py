@@ -1,6 +1,6 @@
 """Sample images utility for the Headshot Curator application."""
 
-import os
+import string
 from pathlib import Path
 from typing import List, Dict, Optional
 import streamlit as st
@@ -8,9 +8,61 @@ from PIL import Image
 
 from .logger import get_logger
 from .config import ConfigManager
+from ..models import decode_sample_image
 
 logger = get_logger(__name__)
 
+_DISPLAY_NAME_SEPARATORS = str.maketrans('_-', '  ')
+
+# Supported sample image extensions
+_SAMPLE_IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.webp'})
+
+
+def _create_display_name(filename_stem: str) -> str:
+    """Create a user-friendly display name from filename.
+    
+    Args:
+        filename_stem: File name without extension
+        
+    Returns:
+        User-friendly display name
+    """
+    # Convert underscores and hyphens to spaces, then capitalize each word
+    return string.capwords(filename_stem.translate(_DISPLAY_NAME_SEPARATORS))
+
+
+@st.cache_data(show_spinner=False)
+def _scan_sample_images(samples_dir: str, mtime_ns: int) -> List[Dict[str, str]]:
+    """Scan the samples directory once per directory modification time.
+    
+    Args:
+        samples_dir: Sample images directory
+        mtime_ns: Directory modification time, used only as part of the cache key
+        
+    Returns:
+        List of dictionaries containing image info, sorted by display name
+    """
+    sample_images = []
+    
+    # Find all image files in the samples directory
+    for file_path in Path(samples_dir).iterdir():
+        if file_path.is_file() and file_path.suffix.lower() in _SAMPLE_IMAGE_EXTENSIONS:
+            # Create a user-friendly display name
+            display_name = _create_display_name(file_path.stem)
+            
+            sample_images.append({
+                'name': file_path.stem,
+                'path': str(file_path),
+                'display_name': display_name,
+                'filename': file_path.name
+            })
+    
+    # Sort by display name for consistent ordering
+    sample_images.sort(key=lambda x: x['display_name'])
+    
+    logger.info(f"Found {len(sample_images)} sample images")
+    return sample_images
+
 
 class SampleImageManager:
     """Manages sample images for testing the application."""
@@ -35,8 +87,6 @@ class SampleImageManager:
         if not self.enabled:
             return []
         
-        sample_images = []
-        
         if not self.samples_dir.exists():
             logger.warning(f"Sample images directory does not exist: {self.samples_dir}")
             # Try to create the directory in case it's missing
@@ -47,58 +97,27 @@ class SampleImageManager:
                 logger.error(f"Could not create sample images directory: {e}")
             return []
         
-        # Supported image extensions
-        supported_extensions = {'.jpg', '.jpeg', '.png', '.webp'}
-        
         try:
-            # Find all image files in the samples directory
-            for file_path in self.samples_dir.iterdir():
-                if file_path.is_file() and file_path.suffix.lower() in supported_extensions:
-                    # Create a user-friendly display name
-                    display_name = self._create_display_name(file_path.stem)
-                    
-                    sample_images.append({
-                        'name': file_path.stem,
-                        'path': str(file_path),
-                        'display_name': display_name,
-                        'filename': file_path.name
-                    })
-            
-            # Sort by display name for consistent ordering
-            sample_images.sort(key=lambda x: x['display_name'])
-            
-            logger.info(f"Found {len(sample_images)} sample images")
-            return sample_images
-            
+            # Adding or removing a file bumps the directory mtime, which is all
+            # the listing depends on
+            return _scan_sample_images(str(self.samples_dir), self.samples_dir.stat().st_mtime_ns)
         except Exception as e:
             logger.error(f"Error scanning sample images directory: {e}")
             return []
     
-    def _create_display_name(self, filename_stem: str) -> str:
-        """Create a user-friendly display name from filename.
-        
-        Args:
-            filename_stem: File name without extension
-            
-        Returns:
-            User-friendly display name
-        """
-        # Convert underscores and hyphens to spaces
-        display_name = filename_stem.replace('_', ' ').replace('-', ' ')
-        
-        # Capitalize each word
-        display_name = ' '.join(word.capitalize() for word in display_name.split())
-        
-        return display_name
-    
     def load_sample_image(self, image_path: str) -> Optional[Image.Image]:
         """Load a sample image from path.
         
+        The image is decoded the same way as for processing: converted to RGB and
+        downscaled to fit within MAX_IMAGE_DIMENSION, so large samples do not come
+        back at their file size.
+        
         Args:
             image_path: Path to the sample image
             
         Returns:
-            PIL Image object or None if loading fails
+            RGB PIL Image no larger than MAX_IMAGE_DIMENSION on either side,
+            or None if loading fails
         """
         try:
             image_path = Path(image_path)
@@ -106,10 +125,10 @@ class SampleImageManager:
                 logger.error(f"Sample image not found: {image_path}")
                 return None
             
-            image = Image.open(image_path)
-            # Convert to RGB if needed
-            if image.mode in ('RGBA', 'P'):
-                image = image.convert('RGB')
+            # Share the app's sample decode: JPEGs are drafted to fit, the file
+            # is closed once decoded, and each caller gets its own copy
+            cached_image, _ = decode_sample_image(str(image_path), image_path.stat().st_mtime_ns)
+            image = cached_image.copy()
                 
             logger.info(f"Successfully loaded sample image: {image_path.name}")
             return image
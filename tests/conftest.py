@@ -4,11 +4,31 @@ import pytest
 from PIL import Image
 import io
 import tempfile
+import uuid
 from pathlib import Path
 
 from headshot_curator.utils.config import ConfigManager
-from headshot_curator.models.image_data import ImageData
+from headshot_curator.models.image_data import ImageData, decode_sample_image
 from headshot_curator.models.session_state import SessionState, ProcessingParameters
+from headshot_curator.processing.headshot_processor import _load_cascade, _load_yunet
+
+
+@pytest.fixture(autouse=True)
+def clear_detector_cache():
+    """Drop cached detectors so each test sees its own mocked classifier."""
+    _load_cascade.cache_clear()
+    _load_yunet.cache_clear()
+    yield
+    _load_cascade.cache_clear()
+    _load_yunet.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_sample_cache():
+    """Drop decoded sample images so each test reads its own files."""
+    decode_sample_image.cache_clear()
+    yield
+    decode_sample_image.cache_clear()
 
 
 @pytest.fixture
@@ -19,31 +39,44 @@ def sample_image():
     return image
 
 
+class MockUploadedFile:
+    """In-memory stand-in for Streamlit's UploadedFile."""
+    
+    def __init__(self, data: bytes, name: str, mime: str):
+        self.name = name
+        self.type = mime
+        self.size = len(data)
+        self.file_id = str(uuid.uuid4())
+        self._buffer = io.BytesIO(data)
+    
+    def read(self, size=-1):
+        return self._buffer.read(size)
+    
+    def seek(self, pos, whence=0):
+        return self._buffer.seek(pos, whence)
+    
+    def tell(self):
+        return self._buffer.tell()
+    
+    def getvalue(self):
+        return self._buffer.getvalue()
+
+
 @pytest.fixture
-def sample_uploaded_file(sample_image):
-    """Create a mock uploaded file object for testing."""
-    class MockUploadedFile:
-        def __init__(self, image):
-            self.name = "test_image.jpg"
-            self.type = "image/jpeg"
-            self.size = 50000
-            
-            # Convert image to bytes
-            buffer = io.BytesIO()
-            image.save(buffer, format='JPEG')
-            buffer.seek(0)
-            self._buffer = buffer
-        
-        def read(self, size=-1):
-            return self._buffer.read(size)
-        
-        def seek(self, pos):
-            return self._buffer.seek(pos)
-        
-        def getvalue(self):
-            return self._buffer.getvalue()
+def make_uploaded_file():
+    """Return a factory that encodes an image into a mock uploaded file."""
+    def _make(image, fmt="JPEG", name="test_image.jpg", mime="image/jpeg"):
+        buffer = io.BytesIO()
+        image.save(buffer, format=fmt)
+        return MockUploadedFile(buffer.getvalue(), name, mime)
     
-    return MockUploadedFile(sample_image)
+    return _make
+
+
+@pytest.fixture
+def sample_uploaded_file(sample_image, make_uploaded_file):
+    """Create a mock uploaded file object for testing."""
+    return make_uploaded_file(sample_image)
 
 
 @pytest.fixture
@@ -86,6 +119,9 @@ def test_config():
             "zoom_out_min": 0.9,
             "zoom_out_max": 2.0
         },
+        "detection": {
+            "detector": "haar"
+        },
         "download_formats": {
             "jpeg": {
                 "format": "JPEG",
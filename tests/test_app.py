@@ -0,0 +1,66 @@
+"""Tests for HeadshotApp source handling."""
+
+from pathlib import Path
+
+import pytest
+from PIL import Image
+from streamlit.testing.v1 import AppTest
+
+from headshot_curator.models.image_data import ImageData
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class TestHeadshotApp:
+    """Test HeadshotApp rerun behaviour."""
+
+    @pytest.fixture
+    def app_test(self, monkeypatch):
+        """Create an AppTest for the entry script with the CAPTCHA already passed."""
+        monkeypatch.chdir(PROJECT_ROOT)
+        at = AppTest.from_file(str(PROJECT_ROOT / "headshot_app.py"), default_timeout=60)
+        at.session_state["captcha_verified"] = True
+        return at
+
+    def test_upload_then_sample_loads_each_source_once(self, app_test, mocker, make_uploaded_file):
+        """Test an upload and a later sample pick are not reloaded on every rerun."""
+        uploaded_file = make_uploaded_file(Image.new('RGB', (400, 500), color='white'))
+        mocker.patch("streamlit.file_uploader", return_value=uploaded_file)
+        upload_spy = mocker.spy(ImageData, "from_uploaded_file")
+        sample_spy = mocker.spy(ImageData, "from_sample_image")
+
+        app_test.run()
+        assert upload_spy.call_count == 1
+        assert app_test.session_state["image_data"].filename == "test_image.jpg"
+
+        # The upload stays in its widget while the user picks a sample; the
+        # most recently changed source wins
+        selector = app_test.selectbox(key="sample_image_selector")
+        selector.set_value(selector.options[1]).run()
+        assert sample_spy.call_count == 1
+        assert app_test.session_state["image_data"].is_sample
+
+        app_test.slider(key="shift_x").set_value(20).run()
+        app_test.slider(key="shift_x").set_value(0).run()
+
+        assert not app_test.exception
+        assert upload_spy.call_count == 1
+        assert sample_spy.call_count == 1
+        assert len(app_test.session_state["image_data"].render_cache) == 2
+
+    def test_rejected_upload_keeps_current_image(self, app_test, mocker, make_uploaded_file):
+        """Test an invalid upload shows an error without discarding the loaded image."""
+        uploader = mocker.patch("streamlit.file_uploader", return_value=None)
+        app_test.run()
+        selector = app_test.selectbox(key="sample_image_selector")
+        selector.set_value(selector.options[1]).run()
+        sample_image = app_test.session_state["image_data"].original_image
+
+        uploader.return_value = make_uploaded_file(Image.new('RGB', (50, 50), color='white'), name="tiny.jpg")
+        app_test.run()
+        app_test.run()
+
+        image_data = app_test.session_state["image_data"]
+        assert image_data.original_image is sample_image
+        assert image_data.processed_image is not None
+        assert any("at least 100x100" in error.value for error in app_test.error)
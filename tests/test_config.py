@@ -34,6 +34,7 @@ class TestConfigManager:
         
         assert "Default" in presets
         assert "Linkedin" in presets
+        assert "Detection" not in presets
         assert len(presets) >= 2
 
     def test_get_preset_config(self, temp_config_file):
@@ -4,6 +4,7 @@ import pytest
 from PIL import Image
 import io
 
+from headshot_curator.constants import RENDER_CACHE_MAX_ENTRIES
 from headshot_curator.models.image_data import ImageData
 from headshot_curator.utils.exceptions import ValidationError, ImageProcessingError
 
@@ -19,6 +20,8 @@ class TestImageData:
         assert image_data.processed_image is None
         assert image_data.filename is None
         assert image_data.get_aspect_ratio() is None
+        assert image_data.processing_cache_key is None
+        assert not hasattr(image_data, "__dict__")
 
     def test_from_uploaded_file_valid(self, sample_uploaded_file):
         """Test creating ImageData from valid uploaded file."""
@@ -74,6 +77,56 @@ class TestImageData:
         
         assert "at least 100x100 pixels" in excinfo.value.user_message
 
+    def test_from_uploaded_file_too_large_rejected_before_decode(self, mocker, make_uploaded_file):
+        """Test oversized images are rejected from the header without decoding pixels."""
+        wide_image = Image.new('RGB', (10001, 100), color='white')
+        wide_file = make_uploaded_file(wide_image, fmt='PNG', name="wide.png", mime="image/png")
+        load_spy = mocker.spy(Image.Image, "load")
+
+        with pytest.raises(ValidationError) as excinfo:
+            ImageData.from_uploaded_file(wide_file)
+
+        assert "smaller than 10000x10000" in excinfo.value.user_message
+        load_spy.assert_not_called()
+
+    def test_from_sample_image_decoded_once(self, tmp_path, mocker):
+        """Test repeated sample selections reuse one decode but get separate images."""
+        sample_path = tmp_path / "sample.jpg"
+        Image.new('RGB', (300, 400), color='white').save(sample_path, format='JPEG')
+        open_spy = mocker.spy(Image, "open")
+        
+        first = ImageData.from_sample_image(str(sample_path), "Sample")
+        second = ImageData.from_sample_image(str(sample_path), "Sample")
+        
+        assert open_spy.call_count == 1
+        assert first.original_image is not second.original_image
+        assert second.original_dimensions == (300, 400)
+        
+        first.clear()
+        assert second.original_image.getpixel((0, 0)) == (255, 255, 255)
+
+    def test_from_uploaded_file_large_jpeg_downscaled(self, make_uploaded_file):
+        """Test large JPEGs are decoded reduced but report their original size."""
+        large_image = Image.new('RGB', (5000, 4000), color='white')
+        
+        image_data = ImageData.from_uploaded_file(make_uploaded_file(large_image, name="large.jpg"))
+        
+        assert image_data.original_dimensions == (5000, 4000)
+        assert max(image_data.original_image.size) == 2048
+        assert image_data.original_image.mode == "RGB"
+
+    def test_from_uploaded_file_landscape_jpeg_drafted_to_fit(self, mocker, make_uploaded_file):
+        """Test a JPEG exactly twice the size limit decodes at half scale with no resize."""
+        landscape_image = Image.new('RGB', (4096, 3000), color='white')
+        landscape_file = make_uploaded_file(landscape_image, name="landscape.jpg")
+        resize_spy = mocker.spy(Image.Image, "resize")
+        
+        image_data = ImageData.from_uploaded_file(landscape_file)
+        
+        assert image_data.original_image.size == (2048, 1500)
+        assert image_data.original_dimensions == (4096, 3000)
+        resize_spy.assert_not_called()
+
     def test_set_processed_image(self, sample_image, image_data_with_image):
         """Test setting processed image."""
         processing_params = {"target_width": 400, "target_height": 500}
@@ -115,11 +168,67 @@ class TestImageData:
         assert summary["filename"] == "test.jpg"
         assert summary["original_size"] == (500, 500)
 
+    def test_render_cache_evicts_least_recently_used(self, sample_image):
+        """Test the render cache keeps the most recently used entries."""
+        image_data = ImageData()
+        for i in range(RENDER_CACHE_MAX_ENTRIES):
+            image_data.cache_render(f"key{i}", sample_image)
+        
+        # Touch the oldest entry so the next insert evicts key1 instead
+        assert image_data.get_cached_render("key0") is sample_image
+        image_data.cache_render("new", sample_image)
+        
+        assert len(image_data.render_cache) == RENDER_CACHE_MAX_ENTRIES
+        assert image_data.get_cached_render("key0") is sample_image
+        assert image_data.get_cached_render("key1") is None
+
+    def test_encoded_processed_image_reused_until_changed(self, sample_image, image_data_with_image):
+        """Test download bytes are encoded once per processed image and format."""
+        image_data_with_image.set_processed_image(sample_image, {})
+        
+        first = image_data_with_image.get_encoded_processed_image({"format": "JPEG", "quality": 90})
+        again = image_data_with_image.get_encoded_processed_image({"quality": 90, "format": "JPEG"})
+        assert first is again
+        assert first[:2] == b"\xff\xd8"
+        
+        image_data_with_image.set_processed_image(sample_image.copy(), {})
+        assert not image_data_with_image.encoded_cache
+
+    def test_processed_preview_reset_with_new_render(self, sample_image, image_data_with_image):
+        """Test the processed preview is dropped when the processed image changes."""
+        image_data_with_image.original_preview = b"original"
+        image_data_with_image.processed_preview = b"processed"
+        
+        image_data_with_image.set_processed_image(sample_image.copy(), {})
+        
+        assert image_data_with_image.processed_preview is None
+        assert image_data_with_image.original_preview == b"original"
+
+    def test_replaced_processed_image_closed_unless_cached(self, image_data_with_image):
+        """Test a replaced processed image is closed only when nothing else holds it."""
+        cached = Image.new('RGB', (400, 500))
+        uncached = Image.new('RGB', (400, 500))
+        image_data_with_image.cache_render("cached", cached)
+        
+        image_data_with_image.set_processed_image(cached, {})
+        image_data_with_image.set_processed_image(uncached, {})
+        assert cached.getpixel((0, 0)) == (0, 0, 0)
+        
+        image_data_with_image.set_processed_image(cached, {})
+        with pytest.raises(ValueError):
+            uncached.getpixel((0, 0))
+
     def test_clear(self, image_data_with_image):
         """Test clearing image data."""
+        original = image_data_with_image.original_image
         image_data_with_image.clear()
         
+        with pytest.raises(ValueError):
+            original.getpixel((0, 0))
+        
         assert image_data_with_image.original_image is None
         assert image_data_with_image.processed_image is None
         assert image_data_with_image.filename is None
-        assert image_data_with_image.original_dimensions is None
\ No newline at end of file
+        assert image_data_with_image.original_dimensions is None
+        assert not image_data_with_image.render_cache
+        assert image_data_with_image.original_preview is None
\ No newline at end of file
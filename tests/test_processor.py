@@ -7,6 +7,7 @@ from PIL import Image
 import pathlib
 
 from headshot_curator.processing.headshot_processor import HeadshotProcessor
+from headshot_curator.models.image_data import ImageData
 from headshot_curator.utils.exceptions import ImageProcessingError, ValidationError
 
 
@@ -41,6 +42,84 @@ class TestHeadshotProcessor:
         assert processor is not None
         assert processor._face_cascade is not None
 
+    @patch('cv2.CascadeClassifier')
+    @patch('cv2.data.haarcascades', '/mock/path/')
+    @patch('pathlib.Path.exists', return_value=True)
+    def test_cascade_shared_between_processors(self, mock_path_exists, mock_cascade):
+        """Test the cascade is loaded once and reused by later processors."""
+        mock_cascade.return_value.empty.return_value = False
+        
+        first = HeadshotProcessor()
+        second = HeadshotProcessor()
+        
+        assert mock_cascade.call_count == 1
+        assert first._face_cascade is second._face_cascade
+
+    @patch('cv2.data.haarcascades', '/mock/path/')
+    @patch('pathlib.Path.exists', return_value=False)
+    def test_missing_cascade_raises(self, mock_path_exists):
+        """Test a missing cascade file raises ImageProcessingError."""
+        with pytest.raises(ImageProcessingError):
+            HeadshotProcessor()
+
+    @patch('cv2.CascadeClassifier')
+    @patch('cv2.data.haarcascades', '/mock/path/')
+    def test_yunet_falls_back_to_cascade_without_model(self, mock_cascade, tmp_path):
+        """Test YuNet is skipped when its model file is missing."""
+        cascade_file = tmp_path / "cascade.xml"
+        cascade_file.touch()
+        mock_cascade.return_value.empty.return_value = False
+        
+        processor = HeadshotProcessor(
+            cascade_path=str(cascade_file),
+            detector="yunet",
+            yunet_model_path=str(tmp_path / "missing.onnx")
+        )
+        
+        assert processor._face_detector is None
+        assert processor._face_cascade is not None
+
+    @patch('cv2.FaceDetectorYN')
+    @patch('cv2.CascadeClassifier')
+    @patch('cv2.data.haarcascades', '/mock/path/')
+    def test_yunet_detects_on_downscaled_colour_image(self, mock_cascade, mock_yunet, tmp_path):
+        """Test YuNet gets a downscaled 3-channel BGR image and boxes are scaled back."""
+        cascade_file = tmp_path / "cascade.xml"
+        cascade_file.touch()
+        model_file = tmp_path / "yunet.onnx"
+        model_file.touch()
+        mock_cascade.return_value.empty.return_value = False
+        detector = mock_yunet.create.return_value
+        # YuNet rows are box, five landmarks and a score
+        detector.detect.return_value = (1, np.array([[64, 64, 128, 128] + [0.0] * 11], dtype=np.float32))
+
+        processor = HeadshotProcessor(
+            cascade_path=str(cascade_file),
+            detector="yunet",
+            yunet_model_path=str(model_file)
+        )
+        image_data = ImageData(original_image=Image.new('RGB', (1280, 1000), color=(255, 0, 0)))
+
+        faces = processor._get_faces(image_data)
+
+        detected_on = detector.detect.call_args[0][0]
+        assert detected_on.shape == (500, 640, 3)
+        assert tuple(detected_on[0, 0]) == (0, 0, 255)
+        detector.setInputSize.assert_called_with((640, 500))
+        assert faces == ((128, 128, 256, 256),)
+        mock_cascade.return_value.detectMultiScale.assert_not_called()
+
+    @patch('cv2.data.haarcascades', '/mock/path/')
+    def test_unknown_detector_raises(self):
+        """Test an unsupported detector name raises ValidationError."""
+        with pytest.raises(ValidationError):
+            HeadshotProcessor(detector="unknown")
+
+    def test_invalid_haar_parameters_raise(self):
+        """Test a Haar scale factor that cannot shrink the window raises ValidationError."""
+        with pytest.raises(ValidationError):
+            HeadshotProcessor(scale_factor=1.0)
+
     def test_validate_processing_params_valid(self, mock_processor):
         """Test validation of valid processing parameters."""
         processor = mock_processor
@@ -149,6 +228,40 @@ class TestHeadshotProcessor:
         
         assert len(faces) == 0
 
+    def test_face_detection_reused_across_params(self, mock_processor, image_data_with_image):
+        """Test detection runs once per image, not once per parameter change."""
+        processor = mock_processor
+        processor._face_cascade.detectMultiScale.return_value = np.array([[150, 150, 200, 200]])
+        params = {
+            "target_width": 400,
+            "target_height": 500,
+            "padding_top_ratio": 0.2,
+            "padding_bottom_ratio": 0.5,
+            "padding_side_ratio": 0.1,
+            "border_color": "#000000",
+            "zoom_out_factor": 1.1,
+            "shift_x": 0,
+            "shift_y": 0
+        }
+        
+        processor.process_image(image_data_with_image, params)
+        processor.process_image(image_data_with_image, {**params, "shift_x": 10})
+        
+        assert processor._face_cascade.detectMultiScale.call_count == 1
+        assert image_data_with_image.detected_faces == ((150, 150, 200, 200),)
+
+    def test_detection_runs_on_downscaled_image(self, mock_processor):
+        """Test large images are shrunk for detection and boxes scaled back."""
+        processor = mock_processor
+        processor._face_cascade.detectMultiScale.return_value = np.array([[64, 64, 128, 128]])
+        image_data = ImageData(original_image=Image.new('RGB', (1280, 1000), color='white'))
+        
+        faces = processor._get_faces(image_data)
+        
+        detected_on = processor._face_cascade.detectMultiScale.call_args[0][0]
+        assert max(detected_on.shape) == 640
+        assert faces == ((128, 128, 256, 256),)
+
     def test_constrain_crop_bounds(self, mock_processor):
         """Test crop bounds constraining."""
         processor = mock_processor